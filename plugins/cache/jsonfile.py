@@ -0,0 +1,188 @@
+#
+# (c) 2026 Red Hat Inc.
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+    short_description: File backed, persistent cache.
+    description:
+        - File backed cache that persists across playbook runs.
+        - Tailored for networking use case, every entry is stored as a JSON file
+          in a per host directory along with its expiry time and a hash of its content.
+        - Cached responses can contain sensitive data, directories and files are
+          created readable only by the current user.
+    version_added: 8.7.0
+    author:
+        - Ansible Networking Team (@ansible-network)
+    name: jsonfile
+    options:
+        cache_dir:
+            description:
+                - Directory the cache files are stored in.
+            type: path
+            default: ~/.ansible/network_cache
+            env:
+                - name: ANSIBLE_NETWORK_CACHE_DIR
+            ini:
+                - section: persistent_connection
+                  key: cache_dir
+        ttl:
+            description:
+                - Number of seconds an entry stays valid after it is added to the cache.
+                - A value of C(0) means entries never expire.
+                - This is separate from the I(ttl) of the C(ansible.netcommon.memory) cache,
+                  whose entries do not expire by default.
+            type: int
+            default: 600
+            env:
+                - name: ANSIBLE_NETWORK_JSONFILE_CACHE_TTL
+            ini:
+                - section: persistent_connection
+                  key: jsonfile_cache_ttl
+        prefix:
+            description:
+                - Namespace the entries are stored under, the C(ansible.netcommon.network_cli)
+                  connection sets this to the remote host.
+            type: str
+            default: ""
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+from ansible.module_utils.common.text.converters import to_bytes, to_text
+from ansible.plugins import AnsiblePlugin
+
+
+class CacheModule(AnsiblePlugin):
+    _persistent = True
+
+    def __init__(self, *args, **kwargs):
+        super(CacheModule, self).__init__(*args, **kwargs)
+        self._cache_dir = None
+        self._ttl = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def set_options(self, task_keys=None, var_options=None, direct=None):
+        super(CacheModule, self).set_options(
+            task_keys=task_keys, var_options=var_options, direct=direct
+        )
+        prefix = re.sub(r"[^\w.\-]", "_", self.get_option("prefix") or "default")
+        self._cache_dir = os.path.join(os.path.expanduser(self.get_option("cache_dir")), prefix)
+        self._ttl = self.get_option("ttl")
+
+    def get(self, key):
+        path = self._path(key)
+        entry = self._read(path)
+        if entry is not None and not self._is_valid(key, entry):
+            self._unlink(path)
+            self.evictions += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["value"]
+
+    def set(self, key, value):
+        os.makedirs(self._cache_dir, mode=0o700, exist_ok=True)
+        entry = {
+            "key": to_text(key, errors="surrogate_or_strict"),
+            "value": value,
+            "hash": _hash(value),
+            "expires": time.time() + self._ttl if self._ttl else None,
+        }
+        # write to a temporary file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            self._unlink(tmp_path)
+            raise
+
+    def keys(self):
+        keys = []
+        for path in self._entries():
+            entry = self._read(path)
+            if isinstance(entry, dict) and "key" in entry:
+                keys.append(entry["key"])
+        return keys
+
+    def delete(self, key):
+        self._unlink(self._path(key))
+
+    def flush(self):
+        for path in self._entries():
+            self._unlink(path)
+
+    def stats(self):
+        """Returns the cache usage counters"""
+        return {
+            "entries": len(self._entries()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def lookup(self, key):
+        return self.get(key)
+
+    def populate(self, key, value):
+        self.set(key, value)
+
+    def invalidate(self):
+        self.flush()
+
+    def _path(self, key):
+        name = hashlib.sha256(to_bytes(key, errors="surrogate_or_strict")).hexdigest()
+        return os.path.join(self._cache_dir, "%s.json" % name)
+
+    def _entries(self):
+        try:
+            names = os.listdir(self._cache_dir)
+        except OSError:
+            return []
+        return [os.path.join(self._cache_dir, name) for name in names if name.endswith(".json")]
+
+    def _is_valid(self, key, entry):
+        """An entry is valid if it is for this key, has not expired and its content is intact"""
+        try:
+            return (
+                entry["key"] == to_text(key, errors="surrogate_or_strict")
+                and (entry["expires"] is None or entry["expires"] > time.time())
+                and entry["hash"] == _hash(entry["value"])
+            )
+        except (KeyError, TypeError):
+            return False
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def _hash(value):
+    return hashlib.sha256(to_bytes(value, errors="surrogate_or_strict")).hexdigest()
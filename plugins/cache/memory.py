@@ -17,8 +17,55 @@ DOCUMENTATION = """
     author:
         - Ansible Networking Team (@ansible-network)
     name: memory
+    options:
+        max_entries:
+            description:
+                - Maximum number of entries held in the cache. When the limit is reached
+                  the least recently used entries are evicted.
+                - The default value of C(0) means the number of entries is not limited.
+            type: int
+            default: 0
+            version_added: 8.7.0
+            env:
+                - name: ANSIBLE_NETWORK_CACHE_MAX_ENTRIES
+            ini:
+                - section: persistent_connection
+                  key: cache_max_entries
+        max_bytes:
+            description:
+                - Maximum total size, in bytes, of the cached keys and values. When the
+                  limit is reached the least recently used entries are evicted.
+                - Text is counted as UTF-8 encoded bytes, other values by the size of
+                  their JSON serialization.
+                - The default value of C(0) means the size of the cache is not limited.
+            type: int
+            default: 0
+            version_added: 8.7.0
+            env:
+                - name: ANSIBLE_NETWORK_CACHE_MAX_BYTES
+            ini:
+                - section: persistent_connection
+                  key: cache_max_bytes
+        ttl:
+            description:
+                - Number of seconds an entry stays valid after it is added to the cache.
+                - The default value of C(0) means entries never expire.
+            type: int
+            default: 0
+            version_added: 8.7.0
+            env:
+                - name: ANSIBLE_NETWORK_CACHE_TTL
+            ini:
+                - section: persistent_connection
+                  key: cache_ttl
 """
 
+import json
+import sys
+import time
+
+from collections import OrderedDict
+
 from ansible.plugins import AnsiblePlugin
 
 
@@ -27,19 +74,79 @@ class CacheModule(AnsiblePlugin):
 
     def __init__(self, *args, **kwargs):
         super(CacheModule, self).__init__(*args, **kwargs)
-        self._cache = {}
+        # key -> (value, size, expiry time), least recently used first
+        self._cache = OrderedDict()
+        self._size = 0
+        self._max_entries = 0
+        self._max_bytes = 0
+        self._ttl = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def set_options(self, task_keys=None, var_options=None, direct=None):
+        super(CacheModule, self).set_options(
+            task_keys=task_keys, var_options=var_options, direct=direct
+        )
+        self._max_entries = self.get_option("max_entries")
+        self._max_bytes = self.get_option("max_bytes")
+        self._ttl = self.get_option("ttl")
+        self._evict()
 
     def get(self, key):
-        return self._cache.get(key)
+        entry = self._cache.get(key)
+        if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._cache.move_to_end(key)
+        return entry[0]
 
     def set(self, key, value):
-        self._cache[key] = value
+        if key in self._cache:
+            self._remove(key)
+        size = _sizeof(key) + _sizeof(value)
+        expires = time.monotonic() + self._ttl if self._ttl else None
+        self._cache[key] = (value, size, expires)
+        self._size += size
+        self._evict()
 
     def keys(self):
         return self._cache.keys()
 
+    def delete(self, key):
+        if key in self._cache:
+            self._remove(key)
+
     def flush(self):
-        self._cache = {}
+        self._cache = OrderedDict()
+        self._size = 0
+
+    def stats(self):
+        """Returns the cache usage counters"""
+        return {
+            "entries": len(self._cache),
+            "bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key):
+        value, size, expires = self._cache.pop(key)
+        self._size -= size
+
+    def _evict(self):
+        """Drops least recently used entries until the cache is within its limits"""
+        while self._cache and (
+            (self._max_entries and len(self._cache) > self._max_entries)
+            or (self._max_bytes and self._size > self._max_bytes)
+        ):
+            self._remove(next(iter(self._cache)))
+            self.evictions += 1
 
     def lookup(self, key):
         return self.get(key)
@@ -49,3 +156,17 @@ class CacheModule(AnsiblePlugin):
 
     def invalidate(self):
         self.flush()
+
+
+def _sizeof(obj):
+    """Returns the size of a key or value in bytes, text is counted UTF-8
+    encoded and other objects by the size of their JSON serialization
+    """
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if not isinstance(obj, str):
+        try:
+            obj = json.dumps(obj, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            return sys.getsizeof(obj)
+    return len(obj.encode("utf-8", "surrogatepass"))
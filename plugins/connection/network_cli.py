@@ -168,6 +168,8 @@ options:
       Paramiko channel after the command prompt is matched. This timeout value ensures
       that command prompt matched is correct and there is no more data left to be
       received from remote host.
+    - The response is considered complete once no data has been received for this
+      long; the wait ends early as soon as more data arrives on the channel.
     default: 0.1
     ini:
     - section: persistent_connection
@@ -255,6 +257,22 @@ options:
       key: network_cli_retries
     vars:
     - name: ansible_network_cli_retries
+  network_cli_recv_buffer_size:
+    description:
+    - Maximum number of bytes read from the SSH channel in a single read. Everything
+      available on the channel, up to this many bytes, is consumed every time data is
+      received and only the newly received data plus a small trailing window of the
+      previous data is matched against the prompt and error patterns.
+    default: 65536
+    type: integer
+    version_added: 8.7.0
+    env:
+    - name: ANSIBLE_NETWORK_CLI_RECV_BUFFER_SIZE
+    ini:
+    - section: persistent_connection
+      key: network_cli_recv_buffer_size
+    vars:
+    - name: ansible_network_cli_recv_buffer_size
   ssh_type:
     description:
       - The python package that will be used by the C(network_cli) connection plugin to create a SSH connection to remote host.
@@ -294,12 +312,42 @@ options:
     version_added: 2.0.0
     description:
     - This option enables caching of data fetched from the target for re-use.
-      The cache is invalidated when the target device enters configuration mode.
+      Cached data is invalidated by configuration changes, see
+      I(single_user_mode_cache).
     - Applicable only for platforms where this has been implemented.
     env:
     - name: ANSIBLE_NETWORK_SINGLE_USER_MODE
     vars:
     - name: ansible_network_single_user_mode
+  single_user_mode_cache:
+    type: string
+    default: ansible.netcommon.memory
+    version_added: 8.7.0
+    description:
+    - Name of the cache plugin used to store data fetched from the target when
+      I(single_user_mode) is enabled.
+    - C(ansible.netcommon.memory) keeps the data for the lifetime of the persistent
+      connection, C(ansible.netcommon.jsonfile) stores it on disk per host so that
+      it can be re-used across playbook runs until it expires.
+    - Regardless of the cache plugin used, commands sent while the target device
+      is in configuration mode, or listed in the C(config_commands) of the cliconf
+      plugin, invalidate cached data.
+    - 'Cliconf plugins declare which cached commands a configuration command can
+      affect with a C(__cache_invalidation_map__) class attribute that maps
+      configuration command regexes to lists of cached command regexes, for example
+      C({"interface ": ["show (ip )?interface", "show run"]}).'
+    - Only the cached responses of matching commands are dropped, and the commands
+      sent inside a mapped configuration section share its entry while the device
+      stays at the prompt the section entered. A configuration command mapped to an
+      empty list invalidates nothing, any other configuration command invalidates
+      the whole cache.
+    env:
+    - name: ANSIBLE_NETWORK_SINGLE_USER_MODE_CACHE
+    ini:
+    - section: persistent_connection
+      key: single_user_mode_cache
+    vars:
+    - name: ansible_network_single_user_mode_cache
   proxy_command:
     default: ''
     description:
@@ -321,18 +369,18 @@ import fcntl
 import getpass
 import json
 import logging
+import math
 import os
 import pickle
 import re
-import signal
 import socket
 import tempfile
 import time
 import traceback
 
 from binascii import hexlify
+from collections import OrderedDict
 from functools import wraps
-from io import BytesIO
 
 from ansible.errors import AnsibleAuthenticationFailure, AnsibleConnectionFailure, AnsibleError
 from ansible.module_utils.basic import missing_required_lib
@@ -349,6 +397,18 @@ from ansible_collections.ansible.netcommon.plugins.plugin_utils.connection_base
 )
 
 
+# the regex parser is private, it is only used to bound the prompt scan
+# overlap, which falls back to MAX_PROMPT_SCAN_OVERLAP without it
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    try:
+        # Python < 3.11
+        import sre_parse
+    except ImportError:
+        sre_parse = None
+
+
 try:
     from scp import SCPClient
 
@@ -371,6 +431,15 @@ except ImportError as err:
     AuthenticationException = None
     BadHostKeyException = None
 
+# Errors reading a libssh channel raises, pylibssh's own exceptions (such as
+# LibsshChannelException from Channel.poll) are not all OSErrors
+try:
+    from pylibsshext.errors import LibsshException
+
+    LIBSSH_CHANNEL_ERRORS = (OSError, LibsshException)
+except ImportError:
+    LIBSSH_CHANNEL_ERRORS = (OSError,)
+
 # Import LooseVersion for paramiko version checks
 try:
     from ansible.module_utils.compat.version import LooseVersion
@@ -396,6 +465,23 @@ AUTHENTICITY_ERR_MSG = (
 # SSH Options Regex for parsing proxy commands
 SETTINGS_REGEX = re.compile(r"(\w+)(?:\s*=\s*|\s+)(.+)")
 
+# Regex flags that can be scoped to one alternative of a combined regex
+INLINE_RE_FLAGS = ((re.I, b"i"), (re.M, b"m"), (re.S, b"s"), (re.X, b"x"))
+BACKREFERENCE_RE = re.compile(rb"\\[1-9]|\(\?P=")
+
+# Upper bound, in bytes, on the tail of an already scanned response that is
+# scanned again when new data arrives. Prompt and error regexes with unbounded
+# repeats are assumed to never match more than this many bytes.
+MAX_PROMPT_SCAN_OVERLAP = 1024
+
+# Number of compiled prompt and terminal regexes kept per connection, every
+# distinct set of command prompts adds one
+REGEX_CACHE_MAXSIZE = 128
+
+# Longest single wait, in seconds, on a libssh channel. pylibssh holds the GIL
+# while it polls, waiting in short slices lets other threads run in between.
+LIBSSH_POLL_SLICE = 0.05
+
 # Base class for MissingHostKeyPolicy (paramiko may not be installed)
 _MissingHostKeyPolicy = object
 if paramiko:
@@ -917,6 +1003,54 @@ class _ParamikoConnection:
         self._connected = False
 
 
+class _Deadline:
+    """
+    Point in time, on the monotonic clock, by which an operation has to
+    complete. Unlike SIGALRM based timers this works from any thread, so a
+    single process can wait on several device sessions at once.
+    """
+
+    def __init__(self, timeout):
+        # a timeout of 0 means the operation never times out
+        self._expires_at = time.monotonic() + timeout if timeout else None
+
+    def remaining(self):
+        """Returns the seconds left before the deadline, None if there is no deadline"""
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def expired(self):
+        return self._expires_at is not None and time.monotonic() >= self._expires_at
+
+
+class _RegexCache(OrderedDict):
+    """Mapping that keeps at most ``maxsize`` entries, dropping the least
+    recently used one when it grows beyond that
+    """
+
+    def __init__(self, maxsize):
+        super(_RegexCache, self).__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super(_RegexCache, self).__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        super(_RegexCache, self).__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
 def ensure_connect(func):
     @wraps(func)
     def wrapped(self, *args, **kwargs):
@@ -928,10 +1062,6 @@ def ensure_connect(func):
     return wrapped
 
 
-class AnsibleCmdRespRecv(Exception):
-    pass
-
-
 class Connection(NetworkConnectionBase):
     """CLI (shell) SSH connections on Paramiko"""
 
@@ -944,12 +1074,20 @@ class Connection(NetworkConnectionBase):
 
         self._matched_prompt = None
         self._matched_cmd_prompt = None
+        self._matched_cmd_prompt_end = None
         self._matched_pattern = None
         self._last_response = None
         self._history = list()
         self._command_response = None
         self._last_recv_window = None
         self._cache = None
+        self._cache_invalidation_policy = None
+        self._cache_invalidation_scope = None
+        # (prompt, in config mode) for the last prompt checked for config mode
+        self._config_mode = None
+        self._config_commands = None
+        # compiled prompt and terminal regexes, reused across commands
+        self._regex_cache = _RegexCache(REGEX_CACHE_MAXSIZE)
 
         self._terminal = None
         self.cliconf = None
@@ -1123,6 +1261,8 @@ class Connection(NetworkConnectionBase):
             task_keys=task_keys, var_options=var_options, direct=direct
         )
         self.ssh_type_conn.set_options(task_keys=task_keys, var_options=var_options, direct=direct)
+        # cliconf options may have changed, rebuild the config command set on next use
+        self._config_commands = None
         # Retain old look_for_keys behaviour, but only if not set
         if not any(
             [
@@ -1334,6 +1474,9 @@ class Connection(NetworkConnectionBase):
         if self._transcript_recording and self._transcript_log:
             self._flush_transcript_log()
 
+        if self._cache is not None:
+            self.queue_message("vvvv", "command cache statistics: %s" % self._cache.stats())
+
         # only close the connection if its connected.
         if self._connected:
             self.queue_message("debug", "closing ssh connection to device")
@@ -1374,10 +1517,69 @@ class Connection(NetworkConnectionBase):
             )
 
     def _read_post_command_prompt_match(self):
-        time.sleep(self.get_option("persistent_buffer_read_timeout"))
-        data = self._ssh_shell.read_bulk_response()
+        try:
+            if not self._wait_for_data(self._buffer_read_timeout):
+                self._handle_buffer_read_timeout()
+                return None
+            data = self._recv_libssh()
+        except LIBSSH_CHANNEL_ERRORS:
+            # channel closed or errored, the response read so far is complete
+            return None
         return data if data else None
 
+    def _get_command_wait_timeout(self):
+        """
+        Returns how long to wait for more of the command response, raising
+        the command timeout error once ``persistent_command_timeout`` expired.
+        """
+        if self._command_deadline.expired():
+            self._handle_command_timeout()
+        remaining = self._command_deadline.remaining()
+        # without a command timeout keep waiting in one second steps
+        return 1.0 if remaining is None else remaining
+
+    def _wait_for_data(self, timeout):
+        """
+        Waits until data is available to be read from the libssh channel
+
+        Waits in slices of at most ``LIBSSH_POLL_SLICE`` seconds, as pylibssh
+        does not release the GIL while polling.
+
+        :arg timeout: Number of seconds to wait for data to arrive.
+        :returns: True as soon as data is available or the channel is closed,
+                  False if nothing was received within ``timeout`` seconds.
+        """
+        # poll returns the number of bytes available to read, SSH_EOF if the
+        # remote end closed the channel and 0 if the wait timed out
+        if timeout <= 0:
+            return self._ssh_shell.poll(timeout=0) != 0
+        deadline = _Deadline(timeout)
+        while not deadline.expired():
+            wait = min(deadline.remaining(), LIBSSH_POLL_SLICE)
+            if self._ssh_shell.poll(timeout=int(math.ceil(wait * 1000))) != 0:
+                return True
+        return False
+
+    def _recv_libssh(self):
+        """
+        Reads everything available on the libssh channel without blocking,
+        up to ``network_cli_recv_buffer_size`` bytes
+
+        :returns: The bytes read, or None if the channel is closed.
+        """
+        chunks = []
+        size = 0
+        while size < self._recv_buffer_size:
+            data = self._ssh_shell.read_nonblocking(size=self._recv_buffer_size - size)
+            if data is None:
+                # channel is closed, return whatever was read before that
+                return b"".join(chunks) if chunks else None
+            if not data:
+                break
+            chunks.append(data)
+            size += len(data)
+        return b"".join(chunks)
+
     def receive_paramiko(
         self,
         command=None,
@@ -1388,45 +1590,49 @@ class Connection(NetworkConnectionBase):
         check_all=False,
         strip_prompt=True,
     ):
-        recv = BytesIO()
-        cache_socket_timeout = self.get_option("persistent_command_timeout")
-        self._ssh_shell.settimeout(cache_socket_timeout)
+        recv = bytearray()
         command_prompt_matched = False
         handled = False
         errored_response = None
 
         while True:
             if command_prompt_matched:
+                # wait for the channel to stay quiet for the buffer read timeout,
+                # recv returns as soon as any more data arrives
+                self._ssh_shell.settimeout(self._buffer_read_timeout)
                 try:
-                    signal.signal(signal.SIGALRM, self._handle_buffer_read_timeout)
-                    signal.setitimer(signal.ITIMER_REAL, self._buffer_read_timeout)
-                    data = self._ssh_shell.recv(256)
-                    signal.alarm(0)
-                    self._log_messages("response-%s: %s" % (self._window_count + 1, data))
-                    # if data is still received on channel it indicates the prompt string
-                    # is wrongly matched in between response chunks, continue to read
-                    # remaining response.
-                    command_prompt_matched = False
-
-                    # restart command_timeout timer
-                    signal.signal(signal.SIGALRM, self._handle_command_timeout)
-                    signal.alarm(self._command_timeout)
-
-                except AnsibleCmdRespRecv:
-                    # reset socket timeout to global timeout
+                    data = self._ssh_shell.recv(self._recv_buffer_size)
+                except socket.timeout:
+                    self._handle_buffer_read_timeout()
                     return self._command_response
+                finally:
+                    # reset socket timeout to global timeout
+                    self._ssh_shell.settimeout(self._command_timeout)
+                self._log_messages("response-%s: %s" % (self._window_count + 1, data))
+                # if data is still received on channel it indicates the prompt string
+                # is wrongly matched in between response chunks, continue to read
+                # remaining response.
+                command_prompt_matched = False
+
+                # restart command_timeout timer
+                self._command_deadline = _Deadline(self._command_timeout)
             else:
-                data = self._ssh_shell.recv(256)
+                self._ssh_shell.settimeout(self._command_deadline.remaining())
+                try:
+                    data = self._ssh_shell.recv(self._recv_buffer_size)
+                except socket.timeout:
+                    self._handle_command_timeout()
                 self._log_messages("response-%s: %s" % (self._window_count + 1, data))
             # when a channel stream is closed, received data will be empty
             if not data:
                 break
 
-            recv.write(data)
-            offset = recv.tell() - 256 if recv.tell() > 256 else 0
-            recv.seek(offset)
+            # match against the new data along with the tail of the previous
+            # data a prompt split across reads could have started in
+            offset = max(0, len(recv) - self._prompt_scan_overlap)
+            recv += data
 
-            window = self._strip(recv.read())
+            window = self._strip(bytes(recv[offset:]))
             self._last_recv_window = window
             self._window_count += 1
 
@@ -1462,7 +1668,7 @@ class Connection(NetworkConnectionBase):
             if self._find_prompt(window):
                 if errored_response:
                     raise AnsibleConnectionFailure(errored_response)
-                self._last_response = recv.getvalue()
+                self._last_response = bytes(recv)
                 resp = self._strip(self._last_response)
                 self._command_response = self._sanitize(resp, command, strip_prompt)
                 if self._buffer_read_timeout == 0.0:
@@ -1481,10 +1687,18 @@ class Connection(NetworkConnectionBase):
         check_all=False,
         strip_prompt=True,
     ):
-        self._command_response = resp = b""
+        self._command_response = b""
+        resp = bytearray()
+        # offset in resp from where the prompt and error regexes need to be
+        # run again, anything before it has already been scanned
+        scan_pos = 0
+        # same for the command prompts, with check_all it never goes back
+        # before the end of the last prompt answered
+        prompt_pos = 0
         command_prompt_matched = False
         handled = False
-        errored_response = None
+        # the error is reported with everything received up to the prompt
+        errored = False
 
         while True:
             if command_prompt_matched:
@@ -1495,11 +1709,16 @@ class Connection(NetworkConnectionBase):
                     return self._command_response
             else:
                 try:
-                    data = self._ssh_shell.read_bulk_response()
+                    if not self._wait_for_data(self._get_command_wait_timeout()):
+                        continue
+                    data = self._recv_libssh()
                 # TODO: Should be ConnectionError when pylibssh drops Python 2 support
-                except OSError:
+                except LIBSSH_CHANNEL_ERRORS:
                     # Socket has closed
                     break
+                if data is None:
+                    # Channel has been closed by the remote end
+                    break
 
             if not data:
                 continue
@@ -1510,7 +1729,17 @@ class Connection(NetworkConnectionBase):
             self._log_messages("response-%s: %s" % (self._window_count, data))
 
             if prompts and not handled:
-                handled = self._handle_prompt(resp, prompts, answer, newline, False, check_all)
+                while True:
+                    self._matched_cmd_prompt_end = None
+                    handled = self._handle_prompt(
+                        resp, prompts, answer, newline, False, check_all, pos=prompt_pos
+                    )
+                    if handled or not check_all or self._matched_cmd_prompt_end is None:
+                        break
+                    # the remaining prompts can already be in this window
+                    prompt_pos = self._matched_cmd_prompt_end
+                    if not prompts:
+                        break
                 self._matched_prompt_window = self._window_count
             elif (
                 prompts
@@ -1528,23 +1757,27 @@ class Connection(NetworkConnectionBase):
                     newline,
                     prompt_retry_check,
                     check_all,
+                    pos=scan_pos,
                 ):
                     raise AnsibleConnectionFailure(
                         "For matched prompt '%s', answer is not valid" % self._matched_cmd_prompt
                     )
 
-            if self._find_error(resp):
+            if self._find_error(resp, scan_pos):
                 # We can't exit here, as we need to drain the buffer in case
                 # the error isn't fatal, and will be using the buffer again
-                errored_response = resp
+                errored = True
 
-            if self._find_prompt(resp):
-                if errored_response:
-                    raise AnsibleConnectionFailure(errored_response)
+            if self._find_prompt(resp, scan_pos):
+                if errored:
+                    raise AnsibleConnectionFailure(bytes(resp))
                 self._last_response = data
-                self._command_response = self._sanitize(resp, command, strip_prompt)
+                self._command_response = self._sanitize(bytes(resp), command, strip_prompt)
                 command_prompt_matched = True
 
+            scan_pos = max(0, len(resp) - self._prompt_scan_overlap)
+            prompt_pos = max(prompt_pos, scan_pos)
+
     def receive(
         self,
         command=None,
@@ -1566,13 +1799,22 @@ class Connection(NetworkConnectionBase):
         # set terminal regex values for command prompt and errors in response
         self._terminal_stderr_re = self._get_terminal_std_re("terminal_stderr_re")
         self._terminal_stdout_re = self._get_terminal_std_re("terminal_stdout_re")
+        self._prompt_scan_overlap = self._get_prompt_scan_overlap(prompts)
 
         self._command_timeout = self.get_option("persistent_command_timeout")
         self._validate_timeout_value(self._command_timeout, "persistent_command_timeout")
+        self._command_deadline = _Deadline(self._command_timeout)
 
         self._buffer_read_timeout = self.get_option("persistent_buffer_read_timeout")
         self._validate_timeout_value(self._buffer_read_timeout, "persistent_buffer_read_timeout")
 
+        self._recv_buffer_size = self.get_option("network_cli_recv_buffer_size")
+        if self._recv_buffer_size <= 0:
+            raise AnsibleConnectionFailure(
+                "'network_cli_recv_buffer_size' value '%s' is invalid, value should be greater"
+                " than zero." % self._recv_buffer_size
+            )
+
         self._log_messages("command: %s" % command)
         if self.ssh_type == "libssh":
             response = self.receive_libssh(
@@ -1627,6 +1869,7 @@ class Connection(NetworkConnectionBase):
                     "Number of prompts (%s) is not same as that of answers (%s)"
                     % (prompt_len, answer_len)
                 )
+        prev_prompt = self._matched_prompt
         try:
             cmd = b"%s\r" % command
             self._history.append(cmd)
@@ -1656,10 +1899,7 @@ class Connection(NetworkConnectionBase):
 
             if (not prompt) and (self._single_user_mode):
                 if self._needs_cache_invalidation(command):
-                    # invalidate the existing cache
-                    if self.get_cache().keys():
-                        self.queue_message("vvvv", "invalidating existing cache")
-                        self.get_cache().invalidate()
+                    self._invalidate_cache(command, prev_prompt)
                 else:
                     # populate cache
                     self.queue_message("vvvv", "populating cache for command: %s" % command)
@@ -1673,15 +1913,14 @@ class Connection(NetworkConnectionBase):
                 % (self._ssh_shell.gettimeout(), command.strip())
             )
 
-    def _handle_buffer_read_timeout(self, signum, frame):
+    def _handle_buffer_read_timeout(self):
         self.queue_message(
             "vvvv",
             "Response received, triggered 'persistent_buffer_read_timeout' timer of %s seconds"
-            % self.get_option("persistent_buffer_read_timeout"),
+            % self._buffer_read_timeout,
         )
-        raise AnsibleCmdRespRecv()
 
-    def _handle_command_timeout(self, signum, frame):
+    def _handle_command_timeout(self):
         msg = (
             "command timeout triggered, timeout value is %s secs.\nSee the timeout setting options in the Network Debug and Troubleshooting Guide."
             % self.get_option("persistent_command_timeout")
@@ -1705,6 +1944,7 @@ class Connection(NetworkConnectionBase):
         newline,
         prompt_retry_check=False,
         check_all=False,
+        pos=0,
     ):
         """
         Matches the command prompt and responds
@@ -1716,6 +1956,7 @@ class Connection(NetworkConnectionBase):
         :param prompt_retry_check: Bool value for trying to detect more prompts
         :param check_all: Bool value to indicate if all the values in prompt sequence should be matched or any one of
                           given prompt.
+        :param pos: Offset in ``resp`` from where the prompts are searched.
         :returns: True if a prompt was found in ``resp``. If check_all is True
                   will True only after all the prompt in the prompts list are matched. False otherwise.
         """
@@ -1725,17 +1966,22 @@ class Connection(NetworkConnectionBase):
             single_prompt = True
         if not isinstance(answer, list):
             answer = [answer]
-        try:
-            prompts_regex = [re.compile(to_bytes(r), re.I) for r in prompts]
-        except re.error as exc:
-            raise ConnectionError(
-                "Failed to compile one or more terminal prompt regexes: %s.\n"
-                "Prompts provided: %s" % (to_text(exc), prompts)
-            )
+        key = ("prompts", tuple(to_bytes(r) for r in prompts), re.I)
+        prompts_regex = self._regex_cache.get(key)
+        if prompts_regex is None:
+            try:
+                prompts_regex = [re.compile(r, re.I) for r in key[1]]
+            except re.error as exc:
+                raise ConnectionError(
+                    "Failed to compile one or more terminal prompt regexes: %s.\n"
+                    "Prompts provided: %s" % (to_text(exc), prompts)
+                )
+            self._regex_cache[key] = prompts_regex
         for index, regex in enumerate(prompts_regex):
-            match = regex.search(resp)
+            match = regex.search(resp, pos)
             if match:
                 self._matched_cmd_prompt = match.group()
+                self._matched_cmd_prompt_end = match.end()
                 self._log_messages("matched command prompt: %s" % self._matched_cmd_prompt)
 
                 # if prompt_retry_check is enabled to check if same prompt is
@@ -1770,33 +2016,39 @@ class Connection(NetworkConnectionBase):
 
         return b"\n".join(cleaned).strip()
 
-    def _find_error(self, response):
+    def _find_error(self, response, pos=0):
         """Searches the buffered response for a matching error condition"""
+        combined = self._get_combined_re(self._terminal_stderr_re)
+        if combined is not None and not combined.search(response, pos):
+            return False
         for stderr_regex in self._terminal_stderr_re:
-            if stderr_regex.search(response):
+            if stderr_regex.search(response, pos):
                 self._log_messages(
                     "matched error regex (terminal_stderr_re) '%s' from response '%s'"
-                    % (stderr_regex.pattern, response)
+                    % (stderr_regex.pattern, bytes(response))
                 )
 
                 self._log_messages(
                     "matched stdout regex (terminal_stdout_re) '%s' from error response '%s'"
-                    % (self._matched_pattern, response)
+                    % (self._matched_pattern, bytes(response))
                 )
                 return True
 
         return False
 
-    def _find_prompt(self, response):
+    def _find_prompt(self, response, pos=0):
         """Searches the buffered response for a matching command prompt"""
+        combined = self._get_combined_re(self._terminal_stdout_re)
+        if combined is not None and not combined.search(response, pos):
+            return False
         for stdout_regex in self._terminal_stdout_re:
-            match = stdout_regex.search(response)
+            match = stdout_regex.search(response, pos)
             if match:
                 self._matched_pattern = stdout_regex.pattern
                 self._matched_prompt = match.group()
                 self._log_messages(
                     "matched cli prompt '%s' with regex '%s' from response '%s'"
-                    % (self._matched_prompt, self._matched_pattern, response)
+                    % (self._matched_prompt, self._matched_pattern, bytes(response))
                 )
                 return True
 
@@ -1828,6 +2080,12 @@ class Connection(NetworkConnectionBase):
         terminal_std_re = []
 
         if terminal_std_option:
+            key = (
+                option,
+                tuple((item.get("pattern"), item.get("flags")) for item in terminal_std_option),
+            )
+            if key in self._regex_cache:
+                return self._regex_cache[key]
             for item in terminal_std_option:
                 if "pattern" not in item:
                     raise AnsibleConnectionFailure(
@@ -1839,12 +2097,82 @@ class Connection(NetworkConnectionBase):
                 if flag:
                     flag = getattr(re, flag.split(".")[1])
                 terminal_std_re.append(re.compile(pattern, flag))
+            self._regex_cache[key] = terminal_std_re
         else:
             # To maintain backward compatibility
             terminal_std_re = getattr(self._terminal, option)
 
         return terminal_std_re
 
+    def _get_prompt_scan_overlap(self, prompts=None):
+        """
+        Returns the number of trailing bytes of an already scanned response
+        that need to be scanned again when more data is received, which is
+        the longest string any of the prompt or error regexes can match,
+        capped at MAX_PROMPT_SCAN_OVERLAP. That cap is used for every regex
+        when the width can not be computed.
+        """
+        patterns = [regex.pattern for regex in self._terminal_stdout_re]
+        patterns.extend(regex.pattern for regex in self._terminal_stderr_re)
+        patterns.extend(to_bytes(prompt) for prompt in to_list(prompts))
+
+        key = ("overlap", tuple(patterns))
+        overlap = self._regex_cache.get(key)
+        if overlap is None:
+            overlap = 0
+            for pattern in patterns:
+                try:
+                    width = int(sre_parse.parse(pattern).getwidth()[1])
+                except Exception:
+                    # no parser, an API it no longer has or a regex error, which
+                    # surfaces where the pattern is used
+                    width = MAX_PROMPT_SCAN_OVERLAP
+                overlap = max(overlap, min(width, MAX_PROMPT_SCAN_OVERLAP))
+            self._regex_cache[key] = overlap
+        return overlap
+
+    def _get_combined_re(self, regexes):
+        """
+        Combines a sequence of compiled regexes into a single alternation that
+        matches wherever any of them matches, so a response that matches none
+        of them is rejected with a single scan. The combined regex is compiled
+        once per connection for every distinct sequence of regexes.
+
+        :returns: The combined regex, or None if the regexes can't be combined
+                  without changing what they match.
+        """
+        if len(regexes) < 2:
+            return None
+        key = ("combined", tuple((regex.pattern, regex.flags) for regex in regexes))
+        try:
+            return self._regex_cache[key]
+        except KeyError:
+            pass
+
+        combined = None
+        alternatives = []
+        for regex in regexes:
+            pattern = regex.pattern
+            flags = regex.flags
+            if not isinstance(pattern, bytes) or BACKREFERENCE_RE.search(pattern):
+                break
+            inline_flags = b""
+            for flag, letter in INLINE_RE_FLAGS:
+                if flags & flag:
+                    inline_flags += letter
+                    flags &= ~flag
+            if flags:
+                break
+            alternatives.append(b"(?%s:%s)" % (inline_flags, pattern))
+        else:
+            try:
+                combined = re.compile(b"|".join(alternatives))
+            except re.error:
+                pass
+
+        self._regex_cache[key] = combined
+        return combined
+
     def copy_file(self, source=None, destination=None, proto="scp", timeout=30):
         """Copies file over scp/sftp to remote device
 
@@ -1907,25 +2235,121 @@ class Connection(NetworkConnectionBase):
 
     def get_cache(self):
         if not self._cache:
-            # TO-DO: support jsonfile or other modes of caching with
-            #        a configurable option
-            self._cache = cache_loader.get("ansible.netcommon.memory")
+            cache_plugin = self.get_option("single_user_mode_cache")
+            self._cache = cache_loader.get(cache_plugin)
+            if not self._cache:
+                raise AnsibleConnectionFailure("unable to load cache plugin %s" % cache_plugin)
+            # cache plugins that persist data namespace it by remote host
+            self._cache.set_options(direct={"prefix": self._play_context.remote_addr})
         return self._cache
 
+    def _invalidate_cache(self, command, prev_prompt):
+        """
+        Drops the cached responses that the config command can make stale,
+        or the whole cache if the cliconf plugin does not map the command.
+
+        :param command: The config command sent to the target device.
+        :param prev_prompt: The prompt the command was sent at.
+        """
+        cache = self.get_cache()
+        patterns = self._get_cache_invalidation_patterns(command, prev_prompt)
+        if patterns is None:
+            if cache.keys():
+                self.queue_message("vvvv", "invalidating existing cache")
+                cache.invalidate()
+            return
+
+        for key in list(cache.keys()):
+            text = to_text(key, errors="surrogate_then_replace")
+            if any(pattern.match(text) for pattern in patterns):
+                self.queue_message("vvvv", "invalidating cache for command: %s" % text)
+                cache.delete(key)
+
+    def _get_cache_invalidation_patterns(self, command, prev_prompt):
+        """
+        Looks up the cached commands a config command can affect.
+
+        Commands sent inside a mapped config section (for example the
+        lines under an `interface` stanza) are recognised by the prompt
+        the section command switched to, and share its patterns. A
+        command that leaves that prompt, or that starts with the same
+        keyword as the section command (like `router bgp` after
+        `router ospf`, which can open a new section at the same prompt),
+        ends the section and invalidates every cached response unless
+        it is mapped itself.
+
+        :param command: The config command sent to the target device.
+        :param prev_prompt: The prompt the command was sent at.
+        :returns: A list of compiled regexes, or None if every cached
+                  response has to be invalidated.
+        """
+        text = to_text(command, errors="surrogate_then_replace").strip()
+        keyword = text.split(None, 1)[0] if text else ""
+        for command_re, patterns in self._get_cache_invalidation_policy():
+            if command_re.match(text):
+                if self._matched_prompt != prev_prompt:
+                    self._cache_invalidation_scope = (self._matched_prompt, patterns, keyword)
+                else:
+                    self._cache_invalidation_scope = None
+                return patterns
+
+        scope = self._cache_invalidation_scope
+        if (
+            scope is not None
+            and prev_prompt is not None
+            and scope[0] == prev_prompt == self._matched_prompt
+            and scope[2] != keyword
+        ):
+            return scope[1]
+        self._cache_invalidation_scope = None
+        return None
+
+    def _get_cache_invalidation_policy(self):
+        """Compiles the cliconf plugin's cache invalidation map once per connection"""
+        if self._cache_invalidation_policy is None:
+            try:
+                invalidation_map = self.cliconf.get_cache_invalidation_map()
+            except AttributeError:
+                # cliconf plugins not derived from the netcommon base class
+                invalidation_map = {}
+            self._cache_invalidation_policy = [
+                (re.compile(command), [re.compile(pattern) for pattern in to_list(patterns)])
+                for command, patterns in (invalidation_map or {}).items()
+            ]
+        return self._cache_invalidation_policy
+
     def _is_in_config_mode(self):
         """
         Check if the target device is in config mode by comparing
         the current prompt with the platform's `terminal_config_prompt`.
         Returns False if `terminal_config_prompt` is not defined.
 
+        The result is kept for the last matched prompt so the check is
+        only repeated once the device answers with a different prompt.
+
         :returns: A boolean indicating if the device is in config mode or not.
         """
-        cfg_mode = False
-        cur_prompt = to_text(self.get_prompt(), errors="surrogate_then_replace").strip()
-        cfg_prompt = getattr(self._terminal, "terminal_config_prompt", None)
-        if cfg_prompt and cfg_prompt.match(cur_prompt):
-            cfg_mode = True
-        return cfg_mode
+        prompt = self._matched_prompt
+        if self._config_mode is None or self._config_mode[0] != prompt:
+            cfg_mode = False
+            cur_prompt = to_text(prompt, errors="surrogate_then_replace").strip()
+            cfg_prompt = getattr(self._terminal, "terminal_config_prompt", None)
+            if cfg_prompt and cfg_prompt.match(cur_prompt):
+                cfg_mode = True
+            self._config_mode = (prompt, cfg_mode)
+        return self._config_mode[1]
+
+    def _get_config_commands(self):
+        """Returns the cliconf plugin's `config_commands` as a frozenset"""
+        if self._config_commands is None:
+            try:
+                # AnsiblePlugin base class in Ansible 2.9 does not have has_option() method.
+                # TO-DO: use has_option() when we drop 2.9 support.
+                cfg_cmds = self.cliconf.get_option("config_commands")
+            except (AttributeError, KeyError):
+                cfg_cmds = []
+            self._config_commands = frozenset(to_text(cmd) for cmd in cfg_cmds or [])
+        return self._config_commands
 
     def _needs_cache_invalidation(self, command):
         """
@@ -1937,14 +2361,4 @@ class Connection(NetworkConnectionBase):
         :param command: The last command sent to the target device.
         :returns: A boolean indicating if cache invalidation is required or not.
         """
-        invalidate = False
-        cfg_cmds = []
-        try:
-            # AnsiblePlugin base class in Ansible 2.9 does not have has_option() method.
-            # TO-DO: use has_option() when we drop 2.9 support.
-            cfg_cmds = self.cliconf.get_option("config_commands")
-        except AttributeError:
-            cfg_cmds = []
-        if (self._is_in_config_mode()) or (to_text(command) in cfg_cmds):
-            invalidate = True
-        return invalidate
+        return self._is_in_config_mode() or to_text(command) in self._get_config_commands()
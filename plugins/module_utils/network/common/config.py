@@ -16,6 +16,9 @@ __metaclass__ = type
 import hashlib
 import re
 
+from functools import lru_cache
+from sys import intern
+
 from ansible.module_utils.common.text.converters import to_bytes, to_native
 
 
@@ -35,13 +38,106 @@ try:
 except AttributeError:
     Pattern = re.Pattern
 
+# brace and semicolon delimiters stripped from a line before it is parsed
+_ENTRY_DELIMITERS = dict.fromkeys(map(ord, "{};"))
+
+
+# bumped whenever the text or parents of an existing ConfigLine change, which
+# changes the keys it is indexed by
+_line_generation = 0
+
+
+class _ConfigItems(list):
+    """A list of config lines counting the changes made to it other than
+    appending, which leave the indexes over it stale
+    """
+
+    __slots__ = ("changes",)
+
+    def __init__(self, *args):
+        super(_ConfigItems, self).__init__(*args)
+        self.changes = 0
+
+
+def _counted(name):
+    method = getattr(list, name)
+
+    def counted(self, *args, **kwargs):
+        self.changes += 1
+        return method(self, *args, **kwargs)
+
+    counted.__name__ = name
+    return counted
+
+
+for _name in ("__setitem__", "__delitem__", "clear", "insert", "pop", "remove", "reverse", "sort"):
+    setattr(_ConfigItems, _name, _counted(_name))
+
+
+class _FirstIndex(object):
+    """Maps keys to the first item with that key in a list
+
+    Items appended since the last lookup are indexed on the next one.  The
+    index is rebuilt if the list is replaced or changed otherwise (see
+    _ConfigItems), or a line's text or parents changed.  Lists other than
+    _ConfigItems can not be tracked and are indexed again on every lookup.
+    """
+
+    __slots__ = ("_items", "_key", "_indexed", "_map", "_changes", "_generation")
+
+    def __init__(self, key):
+        self._key = key
+        self._items = None
+        self._indexed = 0
+        self._map = dict()
+        self._changes = None
+        self._generation = None
+
+    def get(self, items, key):
+        changes = getattr(items, "changes", None)
+        if (
+            items is not self._items
+            or changes is None
+            or changes != self._changes
+            or len(items) < self._indexed
+            or _line_generation != self._generation
+        ):
+            self._items = items
+            self._indexed = 0
+            self._map = dict()
+            self._changes = changes
+            self._generation = _line_generation
+        for index in range(self._indexed, len(items)):
+            item = items[index]
+            self._map.setdefault(self._key(item), item)
+        self._indexed = len(items)
+        return self._map.get(key)
+
+
+def _path_key(item):
+    return tuple(item.parents) + (item.text,)
+
+
+def _line_key(item):
+    return item.line
+
+
+def _text_key(item):
+    return item.text
+
 
 class ConfigLine(object):
+    # large configs create one object per line, keep them small
+    __slots__ = ("_text", "raw", "_children", "__parents", "_line", "_child_index")
+
     def __init__(self, raw):
-        self.text = str(raw).strip()
-        self.raw = raw
-        self._children = list()
-        self._parents = list()
+        # identical lines repeat a lot across sections, share their strings
+        self._text = intern(str(raw).strip())
+        # str subclasses such as AnsibleUnicode can not be interned
+        self.raw = intern(raw) if type(raw) is str else raw
+        self._children = _ConfigItems()
+        self._set_parents(())
+        self._child_index = None
 
     def __str__(self):
         return self.raw
@@ -52,17 +148,61 @@ class ConfigLine(object):
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def __hash__(self):
+        return hash(self.line)
+
     def __getitem__(self, key):
-        for item in self._children:
-            if item.text == key:
-                return item
-        raise KeyError(key)
+        item = self._get_child(key)
+        if item is None:
+            raise KeyError(key)
+        return item
+
+    def _get_child(self, text):
+        """Returns the first child with the given text or None"""
+        if self._child_index is None:
+            self._child_index = _FirstIndex(_text_key)
+        return self._child_index.get(self._children, text)
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        global _line_generation
+        self._text = value
+        _line_generation += 1
+        self._reset_line()
+
+    def _reset_line(self):
+        self._line = None
+        for child in self._children:
+            child._reset_line()
+
+    @property
+    def _parents(self):
+        return self.__parents
+
+    @_parents.setter
+    def _parents(self, value):
+        global _line_generation
+        self._set_parents(value)
+        _line_generation += 1
+
+    def _set_parents(self, value):
+        """Sets the parents of a line that is not indexed yet"""
+        # parents are stored as a tuple so siblings can share the same one
+        self.__parents = tuple(value)
+        self._line = None
 
     @property
     def line(self):
-        line = self.parents
-        line.append(self.text)
-        return " ".join(line)
+        # the full path is compared and hashed a lot when diffing, build it once
+        if self._line is None:
+            line = self.parents
+            line.append(self.text)
+            self._line = " ".join(line)
+        return self._line
 
     @property
     def children(self):
@@ -105,6 +245,75 @@ def ignore_line(text, tokens=None):
             return True
 
 
+@lru_cache(maxsize=32)
+def _ignore_lines_matcher(tokens, patterns):
+    """Returns a function telling if a line is a comment or should be ignored
+
+    The comment tokens and the ignore patterns are folded into a single
+    regex, patterns that cannot be safely combined are matched one by one.
+    Matchers are cached by their tokens and patterns, so configs sharing the
+    same ignore lines reuse the compiled regex.
+
+    :param tokens: A tuple of the comment tokens a line can start with
+    :param patterns: A tuple of the compiled regexes to match against the line
+    :returns: A function taking the stripped line text, its result is truthy if the
+        line should be ignored
+    """
+    alternatives = [re.escape(token) for token in tokens]
+    separate = list()
+    for regex in patterns:
+        # capture groups would renumber backreferences of the patterns that follow
+        if isinstance(regex.pattern, str) and regex.flags == re.UNICODE and not regex.groups:
+            alternatives.append("(?:%s)" % regex.pattern)
+        else:
+            separate.append(regex)
+
+    try:
+        combined = re.compile("|".join(alternatives)) if alternatives else None
+    except re.error:
+        separate = list(patterns)
+        combined = re.compile("|".join(map(re.escape, tokens))) if tokens else None
+
+    if not separate:
+        return combined.match if combined is not None else lambda text: False
+
+    def matcher(text):
+        if combined is not None and combined.match(text):
+            return True
+        return any(regex.match(text) for regex in separate)
+
+    return matcher
+
+
+def _iter_lines(lines):
+    """Yields the lines of config text or of an iterable of lines such as an open file"""
+    if isinstance(lines, (str, bytes)):
+        for line in to_native(lines, errors="surrogate_or_strict").split("\n"):
+            yield line
+    else:
+        for line in lines:
+            line = to_native(line, errors="surrogate_or_strict")
+            yield line[:-1] if line.endswith("\n") else line
+
+
+def _collect_lines(lines, collected):
+    """Yields the lines of an iterable, appending each of them to collected"""
+    for line in lines:
+        collected.append(line)
+        yield line
+
+
+def _iter_config_lines(lines, ignore):
+    """Yields the lines that are not blank, delimiters only or ignored"""
+    for line in _iter_lines(lines):
+        text = line.strip()
+        if "{" in text or "}" in text or ";" in text:
+            text = text.translate(_ENTRY_DELIMITERS).strip()
+
+        if text and not ignore(text):
+            yield line
+
+
 def _obj_to_text(x):
     return [o.text for o in x]
 
@@ -115,15 +324,28 @@ def _obj_to_raw(x):
 
 def _obj_to_block(objects, visited=None):
     items = list()
+    seen = set()
     for o in objects:
-        if o not in items:
+        if o.line not in seen:
             items.append(o)
+            seen.add(o.line)
             for child in o._children:
-                if child not in items:
+                if child.line not in seen:
                     items.append(child)
+                    seen.add(child.line)
     return _obj_to_raw(items)
 
 
+def _expand(configobj, items, seen):
+    """Appends configobj and its descendants to items, skipping lines already in seen"""
+    items.append(configobj)
+    seen.add(configobj.line)
+    for child in configobj._children:
+        if child.line not in seen:
+            _expand(child, items, seen)
+    return items
+
+
 def dumps(objects, output="block", comments=False):
     if output == "block":
         items = _obj_to_block(objects)
@@ -154,15 +376,17 @@ def dumps(objects, output="block", comments=False):
 class NetworkConfig(object):
     def __init__(self, indent=1, contents=None, comment_tokens=None, ignore_lines=None):
         self._indent = indent
-        self._items = list()
+        self._items = _ConfigItems()
         self._config_text = None
         self.comment_tokens = comment_tokens
+        # lookups by path and by line, kept up to date as items are added
+        self._path_index = _FirstIndex(_path_key)
+        self._line_index = _FirstIndex(_line_key)
 
-        if ignore_lines:
-            for item in ignore_lines:
-                if not isinstance(item, Pattern):
-                    item = re.compile(item)
-                DEFAULT_IGNORE_LINES_RE.add(item)
+        # ignore lines only apply to this config, on top of DEFAULT_IGNORE_LINES_RE
+        self._ignore_lines = tuple(
+            item if isinstance(item, Pattern) else re.compile(item) for item in ignore_lines or ()
+        )
 
         if contents:
             self.load(contents)
@@ -197,40 +421,48 @@ class NetworkConfig(object):
         return len(self._items)
 
     def load(self, s):
-        self._config_text = s
+        """Loads config text, or streams it from an iterable of lines such as an open file
+
+        The config text is only kept (see `config_text`) when it is passed as a string.
+        """
+        self._config_text = s if isinstance(s, (str, bytes)) else None
         self._items = self.parse(s)
 
     def loadfp(self, fp):
+        """Loads config from a file, parsing it line by line as it is read"""
+        lines = []
         with open(fp) as f:
-            return self.load(f.read())
+            self.load(_collect_lines(f, lines))
+        self._config_text = "".join(lines)
+
+    def _get_ignore_matcher(self):
+        return _ignore_lines_matcher(
+            tuple(self.comment_tokens or DEFAULT_COMMENT_TOKENS),
+            tuple(DEFAULT_IGNORE_LINES_RE) + self._ignore_lines,
+        )
 
     def parse(self, lines):
-        toplevel = re.compile(r"\S")
-        childline = re.compile(r"^\s*(.+)$")
-        entry_reg = re.compile(r"([{};])")
+        ignore = self._get_ignore_matcher()
 
         ancestors = list()
-        config = list()
+        # chains[i] is the parents tuple shared by all children of ancestors[i]
+        chains = list()
+        config = _ConfigItems()
 
         indents = [0]
 
-        for linenum, line in enumerate(to_native(lines, errors="surrogate_or_strict").split("\n")):
-            text = entry_reg.sub("", line).strip()
-
+        for line in _iter_config_lines(lines, ignore):
             cfg = ConfigLine(line)
 
-            if not text or ignore_line(text, self.comment_tokens):
-                continue
-
             # handle top level commands
-            if toplevel.match(line):
+            if not line[0].isspace():
                 ancestors = [cfg]
+                chains = [(cfg,)]
                 indents = [0]
 
             # handle sub level commands
             else:
-                match = childline.match(line)
-                line_indent = match.start(1)
+                line_indent = len(line) - len(line.lstrip())
 
                 if line_indent < indents[-1]:
                     while indents[-1] > line_indent:
@@ -242,16 +474,19 @@ class NetworkConfig(object):
                 curlevel = len(indents) - 1
                 parent_level = curlevel - 1
 
-                cfg._parents = ancestors[:curlevel]
-
                 if curlevel > len(ancestors):
+                    cfg._set_parents(chains[-1] if chains else ())
                     config.append(cfg)
                     continue
 
+                cfg._set_parents(chains[parent_level])
+
                 for i in range(curlevel, len(ancestors)):
                     ancestors.pop()
+                    chains.pop()
 
                 ancestors.append(cfg)
+                chains.append(chains[parent_level] + (cfg,))
                 ancestors[parent_level].add_child(cfg)
 
             config.append(cfg)
@@ -259,10 +494,7 @@ class NetworkConfig(object):
         return config
 
     def get_object(self, path):
-        for item in self.items:
-            if item.text == path[-1]:
-                if item.parents == path[:-1]:
-                    return item
+        return self._path_index.get(self._items, tuple(path))
 
     def get_block(self, path):
         if not isinstance(path, list):
@@ -279,19 +511,12 @@ class NetworkConfig(object):
     def _expand_block(self, configobj, S=None):
         if S is None:
             S = list()
-        S.append(configobj)
-        for child in configobj._children:
-            if child in S:
-                continue
-            self._expand_block(child, S)
-        return S
+        return _expand(configobj, S, set(item.line for item in S))
 
     def _diff_line(self, other):
-        updates = list()
-        for item in self.items:
-            if item not in other:
-                updates.append(item)
-        return updates
+        # index the full paths of other once rather than scanning it per line
+        lines = set(item.line for item in other)
+        return [item for item in self.items if item.line not in lines]
 
     def _diff_strict(self, other):
         updates = list()
@@ -348,13 +573,16 @@ class NetworkConfig(object):
 
         if replace == "block":
             parents = list()
+            seen = set()
             for item in updates:
                 if not item.has_parents:
                     parents.append(item)
+                    seen.add(item.line)
                 else:
                     for p in item._parents:
-                        if p not in parents:
+                        if p.line not in seen:
                             parents.append(p)
+                            seen.add(p.line)
 
             updates = list()
             for item in parents:
@@ -370,13 +598,14 @@ class NetworkConfig(object):
                 # If parent of current line not added in expanded list flag it
                 # to be added later on
                 if (
-                    all([curr_elem.has_parents, last_elem.has_parents])
-                    and curr_elem.parents[0] != last_elem.parents[0]
+                    curr_elem.has_parents
+                    and last_elem.has_parents
+                    and curr_elem._parents[0].text != last_elem._parents[0].text
                 ):
                     add_parents = True
                 # check if parent of current line is already added, if added don't
                 # add again
-                if last_elem.has_children and last_elem.children[0] != curr_elem.text:
+                if last_elem.has_children and last_elem._children[0].text != curr_elem.text:
                     add_parents = True
             for p in curr_elem._parents:
                 if p.line not in visited or add_parents:
@@ -392,55 +621,82 @@ class NetworkConfig(object):
         offset = 0
         obj = None
 
+        ignore = self._get_ignore_matcher()
+
         # global config command
         if not parents:
             for line in lines:
                 # handle ignore lines
-                if ignore_line(line, self.comment_tokens):
+                if ignore(line):
                     continue
 
                 item = ConfigLine(line)
                 item.raw = line
-                if item not in self.items:
+                if self._line_index.get(self._items, item.line) is None:
                     self.items.append(item)
 
         else:
             for index, p in enumerate(parents):
-                try:
-                    i = index + 1
-                    obj = self.get_block(parents[:i])[0]
+                obj = self.get_object(parents[: index + 1])
+                if obj is not None:
                     ancestors.append(obj)
 
-                except ValueError:
+                else:
                     # add parent to config
                     offset = index * self._indent
                     obj = ConfigLine(p)
                     obj.raw = p.rjust(len(p) + offset)
                     if ancestors:
-                        obj._parents = list(ancestors)
+                        obj._set_parents(ancestors)
                         ancestors[-1]._children.append(obj)
                     self.items.append(obj)
                     ancestors.append(obj)
 
             # add child objects
+            ancestors = tuple(ancestors)
             for line in lines:
                 # handle ignore lines
-                if ignore_line(line, self.comment_tokens):
+                if ignore(line):
                     continue
 
                 # check if child already exists
-                for child in ancestors[-1]._children:
-                    if child.text == line:
-                        break
-                else:
+                if ancestors[-1]._get_child(line) is None:
                     offset = len(parents) * self._indent
                     item = ConfigLine(line)
                     item.raw = line.rjust(len(line) + offset)
-                    item._parents = ancestors
+                    item._set_parents(ancestors)
                     ancestors[-1]._children.append(item)
                     self.items.append(item)
 
 
+def config_sha1(lines, comment_tokens=None, ignore_lines=None):
+    """Returns the sha1 digest `NetworkConfig.sha1` would return for the config
+
+    The digest is computed in a single pass over the lines, without building
+    the config tree, which makes comparing config snapshots cheap.
+
+    :param lines: The config text or an iterable of lines such as an open file,
+                  None is treated as an empty config
+    :param comment_tokens: The comment tokens of the config, see `NetworkConfig`
+    :param ignore_lines: Additional lines to ignore, see `NetworkConfig`
+    :returns: The sha1 digest as bytes
+    """
+    if lines is None:
+        lines = ""
+
+    ignore = NetworkConfig(
+        comment_tokens=comment_tokens, ignore_lines=ignore_lines
+    )._get_ignore_matcher()
+
+    sha1 = hashlib.sha1()
+    separator = b""
+    for line in _iter_config_lines(lines, ignore):
+        sha1.update(separator)
+        sha1.update(to_bytes(line, errors="surrogate_or_strict"))
+        separator = b"\n"
+    return sha1.digest()
+
+
 class CustomNetworkConfig(NetworkConfig):
     def items_text(self):
         return [item.text for item in self.items]
@@ -448,12 +704,7 @@ class CustomNetworkConfig(NetworkConfig):
     def expand_section(self, configobj, S=None):
         if S is None:
             S = list()
-        S.append(configobj)
-        for child in configobj.child_objs:
-            if child in S:
-                continue
-            self.expand_section(child, S)
-        return S
+        return _expand(configobj, S, set(item.line for item in S))
 
     def to_block(self, section):
         return "\n".join([item.raw for item in section])
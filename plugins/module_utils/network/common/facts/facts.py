@@ -13,6 +13,8 @@ __metaclass__ = type
 The facts base class
 this contains methods common to all facts subsets
 """
+import re
+
 from ansible.module_utils.common.text.converters import to_text
 
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.network import (
@@ -23,14 +25,27 @@ from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.n
 class FactsBase(object):
     """
     The facts base class
+
+    Resource facts classes normally fetch their own slice of the device
+    config in populate_facts. A platform that sets CONFIG_SNAPSHOT_COMMAND
+    fetches the output of that command once per instance instead, and each
+    resource facts class declaring CONFIG_SNAPSHOT_SECTIONS, a list of
+    regexes matched against the top level lines of that output, is handed
+    the matching blocks as its data. Resource facts classes that declare
+    nothing, or any of them if fetching the snapshot fails, fetch their own
+    config as before.
     """
 
+    CONFIG_SNAPSHOT_COMMAND = None
+
     def __init__(self, module):
         self._module = module
         self._warnings = []
         self._gather_subset = module.params.get("gather_subset")
         self._gather_network_resources = module.params.get("gather_network_resources")
         self._connection = None
+        self._config_snapshot = None
+        self._config_snapshot_blocks = None
         if module.params.get("state") not in ["rendered", "parsed"]:
             self._connection = get_resource_connection(module)
 
@@ -123,11 +138,71 @@ class FactsBase(object):
                     )
 
             for inst in instances:
+                inst_data = data
+                if inst_data is None:
+                    inst_data = self.get_config_snapshot_sections(
+                        getattr(inst, "CONFIG_SNAPSHOT_SECTIONS", None)
+                    )
                 try:
-                    inst.populate_facts(self._connection, self.ansible_facts, data)
+                    inst.populate_facts(self._connection, self.ansible_facts, inst_data)
                 except Exception as exc:
                     self._module.fail_json(msg=to_text(exc))
 
+    def get_config_snapshot(self):
+        """Fetch the output of CONFIG_SNAPSHOT_COMMAND, once per instance
+
+        :rtype: str
+        :returns: The config snapshot, None if there is no command or
+                  connection, or the command failed
+        """
+        if self._config_snapshot is None:
+            if not self.CONFIG_SNAPSHOT_COMMAND or self._connection is None:
+                return None
+            try:
+                snapshot = self._connection.get(self.CONFIG_SNAPSHOT_COMMAND)
+            except Exception as exc:
+                self._warnings.append(
+                    "unable to fetch a config snapshot with '%s', resource facts "
+                    "are fetched separately: %s" % (self.CONFIG_SNAPSHOT_COMMAND, to_text(exc))
+                )
+                self._config_snapshot = False
+                return None
+            self._config_snapshot = to_text(snapshot, errors="surrogate_then_replace")
+        return self._config_snapshot or None
+
+    def get_config_snapshot_sections(self, sections):
+        """Get the blocks of the config snapshot a resource facts class needs
+
+        A block is a top level line with the indented lines that follow it.
+
+        :param sections: regexes matched against the top level lines
+        :rtype: str
+        :returns: The matching blocks in snapshot order, None if sections is
+                  None or there is no snapshot
+        """
+        if sections is None:
+            return None
+        snapshot = self.get_config_snapshot()
+        if snapshot is None:
+            return None
+        if self._config_snapshot_blocks is None:
+            blocks = []
+            for line in snapshot.splitlines():
+                if not line.strip():
+                    continue
+                if line[0].isspace() and blocks:
+                    blocks[-1].append(line)
+                else:
+                    blocks.append([line])
+            self._config_snapshot_blocks = blocks
+
+        regexes = [re.compile(section) for section in sections]
+        lines = []
+        for block in self._config_snapshot_blocks:
+            if any(regex.match(block[0]) for regex in regexes):
+                lines.extend(block)
+        return "\n".join(lines)
+
     def get_network_legacy_facts(self, fact_legacy_obj_map, legacy_facts_type=None):
         if not legacy_facts_type:
             legacy_facts_type = self._gather_subset
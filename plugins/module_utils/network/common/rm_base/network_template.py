@@ -16,7 +16,10 @@ __metaclass__ = type
 
 import re
 
+from collections import OrderedDict
+from collections.abc import Mapping
 from copy import deepcopy
+from itertools import chain
 
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.rm_base.resource_module_base import (
     RmEngineBase,
@@ -24,6 +27,7 @@ from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.r
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import (
     JinjaTemplate,
     dict_merge,
+    sort_list,
 )
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import (
     validate_config as _validate_config,
@@ -37,6 +41,301 @@ except ImportError:
     from ansible.module_utils.common.parameters import list_no_log_values
 
 
+# scoped inline flag letters for the flags a parser's getval may carry,
+# re.UNICODE is implied by str patterns and needs no letter
+_SCOPED_FLAGS = (
+    (re.ASCII, "a"),
+    (re.IGNORECASE, "i"),
+    (re.MULTILINE, "m"),
+    (re.DOTALL, "s"),
+    (re.VERBOSE, "x"),
+)
+
+# compiled parser tables, keyed by id() of the PARSERS list they were
+# built from, the table holds a reference to the list so the id stays valid
+_PARSER_TABLES = OrderedDict()
+_PARSER_TABLES_MAXSIZE = 64
+
+
+def _dispatch_source(regex):
+    """Return the source of a compiled getval regex rewritten for use as one
+    branch of the dispatch regex, every group made non-capturing and the
+    pattern's flags scoped to the branch. Returns None if the pattern can
+    not be rewritten without changing what it matches (backreferences,
+    conditionals, global inline flags or flags without a scoped form).
+
+    :param regex: a compiled str regex
+    :returns: the rewritten source or None
+    """
+    source = regex.pattern
+    if not isinstance(source, str):
+        return None
+    flags = regex.flags & ~re.UNICODE
+    letters = ""
+    for flag, letter in _SCOPED_FLAGS:
+        if flags & flag:
+            letters += letter
+            flags &= ~flag
+    if flags:
+        return None
+
+    out = []
+    idx = 0
+    size = len(source)
+    in_class = False
+    while idx < size:
+        char = source[idx]
+        if char == "\\":
+            escaped = source[idx + 1 : idx + 2]
+            if escaped.isdigit() and escaped != "0":
+                return None
+            out.append(source[idx : idx + 2])
+            idx += 2
+            continue
+        if in_class:
+            if char == "]":
+                in_class = False
+        elif char == "[":
+            in_class = True
+            out.append(char)
+            idx += 1
+            # a leading ] (after an optional ^) is a literal
+            if source[idx : idx + 1] == "^":
+                out.append("^")
+                idx += 1
+            if source[idx : idx + 1] == "]":
+                out.append("]")
+                idx += 1
+            continue
+        elif char == "(":
+            if source.startswith("(?P<", idx):
+                end = source.find(">", idx)
+                if end == -1:
+                    return None
+                out.append("(?:")
+                idx = end + 1
+                continue
+            if source.startswith("(?P=", idx) or source.startswith("(?(", idx):
+                return None
+            if source.startswith("(?", idx):
+                if re.match(r"\(\?[aiLmsux]+\)", source[idx:]):
+                    return None
+            else:
+                out.append("(?:")
+                idx += 1
+                continue
+        out.append(char)
+        idx += 1
+    source = "".join(out)
+    if letters:
+        if "x" in letters:
+            # a trailing comment would swallow the closing parenthesis
+            source += "\n"
+        source = "(?{0}:{1})".format(letters, source)
+    else:
+        source = "(?:{0})".format(source)
+    try:
+        if re.compile(source).groups:
+            return None
+    except re.error:
+        return None
+    return source
+
+
+def _compile_result(tmplt):
+    """Compile a parser's result template into a render function, it
+    produces the same output as NetworkTemplate._deepformat for a deep copy of
+    the template without copying the template itself.
+
+    :param tmplt: the result template
+    :returns: a function taking the template engine and the variables
+    """
+    if isinstance(tmplt, str):
+
+        def render_str(template, data):
+            return template(value=tmplt, variables=data, fail_on_undefined=False)
+
+        return render_str
+
+    if isinstance(tmplt, dict):
+        entries = []
+        for tkey, tval in tmplt.items():
+            if isinstance(tval, list):
+                entries.append((tkey, list, [_compile_item(x) for x in tval]))
+            elif isinstance(tval, (dict, str)):
+                entries.append((tkey, type(tval), _compile_result(tval)))
+            else:
+                entries.append((tkey, None, None))
+
+        def render_dict(template, data):
+            # shallow, as in _deepformat
+            wtmplt = dict(tmplt)
+            for tkey, kind, render in entries:
+                ftkey = template(tkey, data)
+                if ftkey != tkey:
+                    wtmplt.pop(tkey)
+                if kind is list:
+                    wtmplt[ftkey] = [each(template, data) for each in render]
+                elif kind is not None:
+                    wtmplt[ftkey] = render(template, data)
+                    if kind is str and wtmplt[ftkey] is None:
+                        wtmplt.pop(ftkey)
+            return wtmplt
+
+        return render_dict
+
+    def render_copy(template, data):
+        return deepcopy(tmplt)
+
+    return render_copy
+
+
+def _compile_item(tmplt):
+    """Compile an entry of a list in a result template, strings and dicts
+    are rendered, anything else is copied as is.
+    """
+    if isinstance(tmplt, (dict, str)):
+        return _compile_result(tmplt)
+
+    def render_copy(template, data):
+        return deepcopy(tmplt)
+
+    return render_copy
+
+
+class _ParserTable(object):
+    """A template's PARSERS compiled for NetworkTemplate.
+
+    Parsers are indexed by name for get_parser. For parse, the getval of
+    every parser is compiled on first use and, where possible, folded into
+    a single dispatch regex of one branch per parser, a line is dispatched
+    with one match against it. The first matching branch is the first
+    matching parser, as regex alternation tries branches in order. Parsers
+    whose getval can not be folded in are tried on their own, but only
+    those ahead of the branch that matched.
+    """
+
+    def __init__(self, parsers):
+        self.parsers = parsers
+        self.size = len(parsers)
+        self.by_name = {}
+        for parser in parsers:
+            self.by_name.setdefault(parser.get("name"), parser)
+        self.regexes = None
+        self.dispatch = None
+        self.unfolded = None
+        self._renderers = {}
+
+    def _compile(self):
+        regexes = [re.compile(parser["getval"]) for parser in self.parsers]
+        branches = []
+        unfolded = []
+        dispatch = None
+        for idx, regex in enumerate(regexes):
+            source = _dispatch_source(regex)
+            if source is None:
+                unfolded.append(idx)
+            else:
+                branches.append("(?P<_{0}>{1})".format(idx, source))
+        if branches:
+            try:
+                dispatch = re.compile("|".join(branches))
+            except re.error:
+                unfolded = list(range(self.size))
+        # tables are shared, regexes marks the table compiled so it is set
+        # last, once the other fields are complete
+        self.dispatch = dispatch
+        self.unfolded = unfolded
+        self.regexes = regexes
+
+    def match(self, line):
+        """Find the first parser matching a line
+
+        :param line: the line to match
+        :returns: a tuple of the parser's index and the match, or None
+        """
+        if self.regexes is None:
+            self._compile()
+        found = None
+        if self.dispatch is not None:
+            cap = self.dispatch.match(line)
+            if cap:
+                found = int(cap.lastgroup[1:])
+        for idx in self.unfolded:
+            if found is not None and idx > found:
+                break
+            cap = self.regexes[idx].match(line)
+            if cap:
+                return idx, cap
+        if found is None:
+            return None
+        return found, self.regexes[found].match(line)
+
+    def renderer(self, idx):
+        """The compiled result renderer of a parser, compiled on first use"""
+        render = self._renderers.get(idx)
+        if render is None:
+            render = _compile_result(self.parsers[idx]["result"])
+            self._renderers[idx] = render
+        return render
+
+
+def _get_parser_table(parsers):
+    """Return the compiled table for a PARSERS list, building it once per
+    list. A list that has grown or shrunk since is compiled again, parsers
+    are otherwise treated as immutable once parsed with.
+    """
+    key = id(parsers)
+    table = _PARSER_TABLES.get(key)
+    if table is None or table.parsers is not parsers or table.size != len(parsers):
+        table = _ParserTable(parsers)
+        _PARSER_TABLES[key] = table
+        if len(_PARSER_TABLES) > _PARSER_TABLES_MAXSIZE:
+            _PARSER_TABLES.popitem(last=False)
+    else:
+        _PARSER_TABLES.move_to_end(key)
+    return table
+
+
+def _merge_into(base, other):
+    """Merge other into base in place, base ends up equal to
+    dict_merge(base, other) without copying base or going over all of its
+    keys for every merge. Values of other are taken over as they are, other
+    must not be used afterwards. Keys new to base are added in the order of
+    other, where dict_merge adds them in set order, which varies between runs.
+
+    :param base: dict object to merge into
+    :param other: dict object to merge
+    :returns: base
+    """
+    if not isinstance(base, dict):
+        raise AssertionError("`base` must be of type <dict>")
+    if not isinstance(other, dict):
+        raise AssertionError("`other` must be of type <dict>")
+
+    for key, item in other.items():
+        if key not in base:
+            base[key] = item
+            continue
+        value = base[key]
+        if item is None:
+            base[key] = None
+        elif isinstance(value, dict):
+            if isinstance(item, Mapping):
+                _merge_into(value, item)
+            else:
+                base[key] = item
+        elif isinstance(value, list):
+            try:
+                base[key] = list(set(chain(value, item)))
+            except TypeError:
+                value.extend([i for i in item if i not in value])
+        elif sort_list(value) != sort_list(item):
+            base[key] = item
+
+    return base
+
+
 class NetworkTemplate(RmEngineBase):
     """The NetworkTemplate class that Resource Module templates
     inherit and use to parse and render config lines.
@@ -50,11 +349,13 @@ class NetworkTemplate(RmEngineBase):
         self._prefix = prefix or {}
 
     def _deepformat(self, tmplt, data):
-        wtmplt = deepcopy(tmplt)
         if isinstance(tmplt, str):
             res = self._template(value=tmplt, variables=data, fail_on_undefined=False)
             return res
         if isinstance(tmplt, dict):
+            # values not rendered below are scalars, everything else is
+            # replaced so a shallow copy does
+            wtmplt = dict(tmplt)
             for tkey, tval in tmplt.items():
                 ftkey = self._template(tkey, data)
                 if ftkey != tkey:
@@ -67,30 +368,52 @@ class NetworkTemplate(RmEngineBase):
                     wtmplt[ftkey] = self._deepformat(tval, data)
                     if wtmplt[ftkey] is None:
                         wtmplt.pop(ftkey)
-        return wtmplt
+            return wtmplt
+        return deepcopy(tmplt)
 
     def parse(self):
-        """parse"""
+        """parse
+
+        The template's PARSERS are compiled once per list, see _ParserTable.
+        Unless _deepformat is overridden, each parser's result is rendered
+        with a compiled renderer and merged into the result in place.
+        """
         result = {}
         shared = {}
+        if not self._lines:
+            return result
+        table = _get_parser_table(self._tmplt.PARSERS)
+        compiled = type(self)._deepformat is NetworkTemplate._deepformat
         for line in self._lines:
-            for parser in self._tmplt.PARSERS:
-                cap = re.match(parser["getval"], line)
-                if cap:
-                    capdict = cap.groupdict()
-                    capdict = dict((k, v) for k, v in capdict.items() if v is not None)
-                    if parser.get("shared"):
-                        shared = capdict
-                    vals = dict_merge(capdict, shared)
+            found = table.match(line)
+            if found:
+                idx, cap = found
+                parser = table.parsers[idx]
+                capdict = cap.groupdict()
+                capdict = dict((k, v) for k, v in capdict.items() if v is not None)
+                if parser.get("shared"):
+                    shared = capdict
+                # captured values are strings, the shared ones take precedence
+                vals = dict(capdict)
+                vals.update(shared)
+                if compiled:
+                    res = table.renderer(idx)(self._template, vals)
+                    _merge_into(result, res)
+                else:
                     res = self._deepformat(deepcopy(parser["result"]), vals)
                     result = dict_merge(result, res)
-                    break
         return result
 
     def get_parser(self, name):
-        """get_parsers"""
-        res = [p for p in self._tmplt.PARSERS if p["name"] == name]
-        return res[0]
+        """get_parsers
+
+        Looked up in the parser table of the template's PARSERS, indexed by
+        name once per list.
+        """
+        try:
+            return _get_parser_table(self._tmplt.PARSERS).by_name[name]
+        except KeyError:
+            raise IndexError("list index out of range")
 
     def _render(self, tmplt, data, negate):
         try:
@@ -118,12 +441,11 @@ class NetworkTemplate(RmEngineBase):
 
     def render(self, data, parser_name, negate=False):
         """render"""
+        parser = self.get_parser(parser_name)
         if negate:
-            tmplt = (
-                self.get_parser(parser_name).get("remval") or self.get_parser(parser_name)["setval"]
-            )
+            tmplt = parser.get("remval") or parser["setval"]
         else:
-            tmplt = self.get_parser(parser_name)["setval"]
+            tmplt = parser["setval"]
         command = self._render(tmplt, data, negate)
         return command
 
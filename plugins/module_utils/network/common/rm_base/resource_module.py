@@ -14,21 +14,30 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import random
+
 from copy import deepcopy
 
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.rm_base.resource_module_base import (
     RmEngineBase,
 )
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import (
+    dict_merge,
     emit_warnings,
-    get_from_dict,
     remove_empties,
     to_list,
 )
 
 
 class ResourceModule(RmEngineBase):  # pylint: disable=R0902
-    """Base class for Network Resource Modules"""
+    """Base class for Network Resource Modules
+
+    By default "after" is gathered from the device again once commands were
+    applied. A resource module passing compute_after=True has it derived
+    from want and before instead, see compute_after, and can pass
+    verify_after, True or the share of runs to check, to gather it anyway
+    and warn if the two differ.
+    """
 
     def __init__(self, *_args, **kwargs):
         super(ResourceModule, self).__init__(*_args, **kwargs)
@@ -38,6 +47,10 @@ class ResourceModule(RmEngineBase):  # pylint: disable=R0902
         self._module = kwargs.get("module", None)
         self._resource = kwargs.get("resource", None)
         self._tmplt = kwargs.get("tmplt", None)
+        self._compute_after = kwargs.get("compute_after", False)
+        self._verify_after = kwargs.get("verify_after", False)
+        self._resource_key = kwargs.get("resource_key", None)
+        self._compval_paths = {}
 
         self.want = remove_empties(self._module.params).get("config", self._empty_fact_val)
         # Error out if empty config is passed for following states
@@ -82,10 +95,81 @@ class ResourceModule(RmEngineBase):  # pylint: disable=R0902
             result["commands"] = self.commands
             result["before"] = self.before
             if self.commands:
-                result["after"] = self.get_facts(self._empty_fact_val)
+                result["after"] = self.get_after()
         result["changed"] = self.changed
         return result
 
+    def get_after(self):
+        """Get the configuration after the commands were applied
+
+        :returns: The configuration computed locally if enabled and possible,
+                  otherwise gathered from the device
+        """
+        after = None
+        if self._compute_after:
+            after = self.compute_after()
+        if after is None:
+            return self.get_facts(self._empty_fact_val)
+
+        if self._verify_after and random.random() < float(self._verify_after):
+            gathered = self.get_facts(self._empty_fact_val)
+            if self._sorted_config(gathered) != self._sorted_config(after):
+                self._module.warn(
+                    "the computed configuration after the change does not match the "
+                    "device, reporting the configuration gathered from the device"
+                )
+                return gathered
+        return after
+
+    def compute_after(self):
+        """Derive the configuration after the commands were applied from
+        want and before, without gathering it from the device.
+
+        Dict resources are merged with want, or replaced by it. List
+        resources are matched by resource_key, their entries are merged
+        with want's, replaced by them or, when overridden, the list is
+        replaced. Device defaults that are not part of want are not known
+        here, use verify_after to check a resource against the device.
+
+        :returns: The configuration, None if it can not be derived for the
+                  state or the data
+        """
+        if self._module.check_mode:
+            return deepcopy(self.before)
+        if self.state not in ("merged", "replaced", "overridden"):
+            return None
+
+        want = deepcopy(self.want)
+        have = deepcopy(self.before) or type(want)()
+        if isinstance(want, dict) and isinstance(have, dict):
+            if self.state == "merged":
+                return dict_merge(have, want)
+            return want
+
+        key = self._resource_key
+        if not (key and isinstance(want, list) and isinstance(have, list)):
+            return None
+        if not all(isinstance(entry, dict) and key in entry for entry in want + have):
+            return None
+        if self.state == "overridden":
+            return want
+
+        after = dict((entry[key], entry) for entry in have)
+        for entry in want:
+            if self.state == "merged" and entry[key] in after:
+                entry = dict_merge(after[entry[key]], entry)
+            after[entry[key]] = entry
+        return list(after.values())
+
+    def _sorted_config(self, config):
+        """Order list resources by resource_key for comparison"""
+        if self._resource_key and isinstance(config, list):
+            try:
+                return sorted(config, key=lambda entry: str(entry.get(self._resource_key)))
+            except AttributeError:
+                return config
+        return config
+
     def addcmd(self, data, tmplt, negate=False):
         """addcmd"""
         command = self._tmplt.render(data, tmplt, negate)
@@ -127,11 +211,9 @@ class ResourceModule(RmEngineBase):  # pylint: disable=R0902
         if have is None:
             have = self.have
         for parser in to_list(parsers):
-            compval = self._tmplt.get_parser(parser).get("compval")
-            if not compval:
-                compval = parser
-            inw = get_from_dict(want, compval)
-            inh = get_from_dict(have, compval)
+            path = self._get_compval_path(parser)
+            inw = self._get_from_path(want, path)
+            inh = self._get_from_path(have, path)
 
             if isinstance(inw, dict) and inw.get("set") is False and not inh:
                 continue
@@ -149,6 +231,46 @@ class ResourceModule(RmEngineBase):  # pylint: disable=R0902
                 else:
                     self.addcmd(have, parser, True)
 
+    def index_by_key(self, items, key="name"):
+        """Index a list of dicts by the value of one of their keys, for
+        constant time lookups instead of search_obj_in_list scans. The
+        first entry wins if several share a value, as with
+        search_obj_in_list.
+
+        :param items: the list of dicts, or None
+        :param key: the key to index by
+        :rtype: dict
+        :returns: The entries by key value, entries without the key are
+                  left out
+        """
+        index = {}
+        for item in items or []:
+            value = item.get(key)
+            if value is not None and value not in index:
+                index[value] = item
+        return index
+
+    def _get_compval_path(self, parser):
+        """The compval keypath of a parser split into keys, memoized per
+        parser name so the parser lookup and split happen once per module
+        """
+        path = self._compval_paths.get(parser)
+        if path is None:
+            compval = self._tmplt.get_parser(parser).get("compval") or parser
+            path = tuple(compval.split("."))
+            self._compval_paths[parser] = path
+        return path
+
+    @staticmethod
+    def _get_from_path(data, path):
+        """get_from_dict for a keypath already split into keys"""
+        try:
+            for key in path:
+                data = data[key]
+        except KeyError:
+            return None
+        return data
+
     def run_commands(self):
         """Send commands to the device"""
         if self.commands and self.state in self.ACTION_STATES:
@@ -23,7 +23,7 @@ import socket
 
 from collections.abc import Mapping
 from copy import deepcopy
-from functools import reduce  # forward compatibility for Python 3
+from functools import lru_cache, reduce  # forward compatibility for Python 3
 from io import StringIO
 from itertools import chain
 
@@ -663,13 +663,80 @@ def compare_partial_dict(want, have, compare_keys):
     return wantd == haved
 
 
+# "{{ name }}" templates are rendered without going through jinja
+SIMPLE_VARIABLE_RE = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+# names that jinja does not resolve as variables
+JINJA_RESERVED_NAMES = frozenset(
+    ["true", "false", "none", "True", "False", "None", "and", "or", "not", "in", "is", "if"]
+)
+
+# characters a python literal can start with, besides the ones in LITERAL_WORD_RE
+LITERAL_START_CHARS = frozenset("0123456789+-.([{'\"")
+LITERAL_WORD_RE = re.compile(r"(?:True|False|None)\b|[bBrRuU]{1,2}['\"]")
+DECIMAL_INT_RE = re.compile(r"-?(?:0|[1-9][0-9]*)")
+# division and dotted numbers (ip addresses, interface numbers) are never literals
+NOT_LITERAL_RE = re.compile(r"/|[0-9]\.[0-9]*\.")
+# comments, line breaks and continuations can hide anything, always parse those
+PARSE_ALWAYS_CHARS = frozenset("#\\\n\r\f\v")
+
+
+def _literal_eval(value):
+    """Returns value evaluated as a python literal, or value itself if it is not one
+
+    Same result as ast.literal_eval falling back to str, strings that cannot
+    be a literal are recognised without parsing them.
+    """
+    if DECIMAL_INT_RE.fullmatch(value):
+        return int(value)
+    if PARSE_ALWAYS_CHARS.isdisjoint(value):
+        stripped = value.lstrip(" \t")
+        if stripped[:1] in LITERAL_START_CHARS:
+            if "'" not in value and '"' not in value and NOT_LITERAL_RE.search(value):
+                return str(value)
+        elif not LITERAL_WORD_RE.match(stripped):
+            return str(value)
+    try:
+        return ast.literal_eval(value)
+    except Exception:
+        return str(value)
+
+
+def _new_jinja_environment():
+    """Returns a new jinja environment for JinjaTemplate"""
+    env = Environment(undefined=StrictUndefined)
+    env.filters.update({"ternary": ternary, "all": all, "any": any})
+    return env
+
+
+@lru_cache(maxsize=None)
+def _get_jinja_environment():
+    """Returns the environment shared by JinjaTemplate instances, it is never
+    handed out so the templates compiled with it can be shared as well
+    """
+    return _new_jinja_environment()
+
+
+@lru_cache(maxsize=1024)
+def _compile_template(source):
+    """Returns source compiled with the shared environment, cached across instances"""
+    return _get_jinja_environment().from_string(source)
+
+
 class JinjaTemplate:
     """Custom Jinja2-based template class for network module utilities.
 
     Note: This class was renamed from 'Template' to 'JinjaTemplate' to avoid
     naming collision with Jinja2's Template class in Ansible 2.19+.
+
+    Instances render through a private environment shared by all of them
+    and reuse the templates compiled with it. The first access to `env`
+    gives the instance its own environment, so changes to its filters or
+    globals stay with that instance, and its templates are compiled on
+    every call from then on.
     """
 
+    _env = None
+
     def __init__(self):
         if not HAS_JINJA2:
             raise ImportError(
@@ -677,8 +744,15 @@ class JinjaTemplate:
                 "It can be installed using `pip install jinja2`"
             )
 
-        self.env = Environment(undefined=StrictUndefined)
-        self.env.filters.update({"ternary": ternary, "all": all, "any": any})
+    @property
+    def env(self):
+        if self._env is None:
+            self._env = _new_jinja_environment()
+        return self._env
+
+    @env.setter
+    def env(self, value):
+        self._env = value
 
     def __call__(self, value, variables=None, fail_on_undefined=True):
         variables = variables or {}
@@ -687,26 +761,37 @@ class JinjaTemplate:
             return value
 
         try:
-            value = self.env.from_string(value).render(variables)
+            value = self._render(value, variables)
         except UndefinedError:
             if not fail_on_undefined:
                 return None
             raise
 
         if value:
-            try:
-                return ast.literal_eval(value)
-            except Exception:
-                return str(value)
+            return _literal_eval(value)
         else:
             return None
 
+    def _render(self, value, variables):
+        match = SIMPLE_VARIABLE_RE.fullmatch(value)
+        if match:
+            name = match.group(1)
+            if name in variables and name not in JINJA_RESERVED_NAMES:
+                return str(variables[name])
+
+        if self._env is None:
+            template = _compile_template(value)
+        else:
+            template = self._env.from_string(value)
+        return template.render(variables)
+
     def contains_vars(self, data):
         if isinstance(data, string_types):
+            env = self._env or _get_jinja_environment()
             for marker in (
-                self.env.block_start_string,
-                self.env.variable_start_string,
-                self.env.comment_start_string,
+                env.block_start_string,
+                env.variable_start_string,
+                env.comment_start_string,
             ):
                 if marker in data:
                     return True
@@ -255,7 +255,7 @@ from ansible.module_utils.common.text.converters import to_text
 from ansible.module_utils.connection import Connection
 
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import (
-    NetworkConfig,
+    config_sha1,
 )
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import (
     warn_and_exit,
@@ -437,12 +437,10 @@ def run(module, device_operations, connection, candidate, running, rollback_id,
             # (timestamps, byte counts, etc.) would cause changed=True on every
             # run, which is especially likely on the platforms that reach this
             # branch since they lack well-formed CLI diff support to begin with.
-            running_config_obj = NetworkConfig(contents=running, ignore_lines=diff_ignore_lines)
-            running_after_config_obj = NetworkConfig(
-                contents=running_after, ignore_lines=diff_ignore_lines
-            )
-
-            if running_config_obj.sha1 != running_after_config_obj.sha1:
+            # The digests match NetworkConfig(...).sha1 without building the config trees.
+            if config_sha1(running, ignore_lines=diff_ignore_lines) != config_sha1(
+                running_after, ignore_lines=diff_ignore_lines
+            ):
                 result["changed"] = True
                 if module._diff:
                     result["diff"] = {"before": running, "after": running_after}
@@ -82,6 +82,12 @@ class CliconfBase(CliconfBaseBase):
         "run_commands",
     ]
 
+    # Maps config commands (regex) to the cached commands (regex) they can affect
+    # when network_cli runs in single_user_mode, eg.
+    # {r"interface\s": [r"show (ip )?interface", r"show run"]}
+    # Config commands that are not in the map invalidate the whole cache.
+    __cache_invalidation_map__ = {}
+
     def __init__(self, connection):
         super(CliconfBase, self).__init__(connection)
         self._connection = connection
@@ -158,6 +164,18 @@ class CliconfBase(CliconfBaseBase):
         """Returns list of base rpc method supported by remote device"""
         return self.__rpc__
 
+    def get_cache_invalidation_map(self):
+        """Returns the map of config commands to the cached commands they can affect
+
+        Used by network_cli in single_user_mode to drop only the cached responses
+        a configuration change can make stale.  A config command mapped to an empty
+        list invalidates nothing, a config command that is not mapped invalidates
+        every cached response.
+
+        :return: A dict of config command regex to a list of cached command regexes
+        """
+        return self.__cache_invalidation_map__
+
     def get_history(self):
         """Returns the history file for all commands
 
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2026 Red Hat, Inc.
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Make coding more python3-ish
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.facts import facts
+
+
+RUNNING_CONFIG = """hostname r1
+!
+interface Eth1
+ description uplink
+ mtu 9000
+!
+vlan 10
+ name ten
+interface Eth2
+ shutdown
+"""
+
+
+class InterfacesFacts(object):
+    CONFIG_SNAPSHOT_SECTIONS = [r"interface\s"]
+
+    def __init__(self, module):
+        self.data = []
+
+    def populate_facts(self, connection, ansible_facts, data=None):
+        if not data:
+            data = connection.get("show running-config | section ^interface")
+        self.data.append(data)
+        ansible_facts["ansible_network_resources"]["interfaces"] = data
+
+
+class HostnameFacts(InterfacesFacts):
+    CONFIG_SNAPSHOT_SECTIONS = [r"hostname\s"]
+
+    def populate_facts(self, connection, ansible_facts, data=None):
+        if not data:
+            data = connection.get("show running-config | include hostname")
+        ansible_facts["ansible_network_resources"]["hostname"] = data
+
+
+class LegacyFacts(InterfacesFacts):
+    CONFIG_SNAPSHOT_SECTIONS = None
+
+    def populate_facts(self, connection, ansible_facts, data=None):
+        ansible_facts["ansible_network_resources"]["legacy"] = data
+
+
+class Facts(facts.FactsBase):
+    CONFIG_SNAPSHOT_COMMAND = "show running-config"
+
+
+FACTS_MAP = {"interfaces": InterfacesFacts, "hostname": HostnameFacts, "legacy": LegacyFacts}
+
+
+@pytest.fixture
+def connection():
+    connection = MagicMock()
+    connection.get.side_effect = lambda command: {
+        "show running-config": RUNNING_CONFIG,
+        "show running-config | section ^interface": "interface Eth1",
+        "show running-config | include hostname": "hostname r1",
+    }[command]
+    with patch.object(facts, "get_resource_connection", return_value=connection):
+        yield connection
+
+
+def get_facts(facts_cls, data=None):
+    module = MagicMock()
+    module.params = {"gather_network_resources": ["all"], "state": "gathered"}
+    inst = facts_cls(module)
+    inst.get_network_resources_facts(FACTS_MAP, data=data)
+    return inst
+
+
+def test_config_snapshot_fetched_once(connection):
+    resources = get_facts(Facts).ansible_facts["ansible_network_resources"]
+    assert resources == {
+        "interfaces": "interface Eth1\n description uplink\n mtu 9000\ninterface Eth2\n shutdown",
+        "hostname": "hostname r1",
+        "legacy": None,
+    }
+    connection.get.assert_called_once_with("show running-config")
+
+
+def test_config_snapshot_not_configured(connection):
+    resources = get_facts(facts.FactsBase).ansible_facts["ansible_network_resources"]
+    assert resources["interfaces"] == "interface Eth1"
+    assert resources["hostname"] == "hostname r1"
+    assert connection.get.call_count == 2
+
+
+def test_config_snapshot_failure_falls_back(connection):
+    get = connection.get.side_effect
+
+    def get_or_timeout(command):
+        if command == "show running-config":
+            raise Exception("timeout")
+        return get(command)
+
+    connection.get.side_effect = get_or_timeout
+    inst = get_facts(Facts)
+    assert inst.ansible_facts["ansible_network_resources"]["interfaces"] == "interface Eth1"
+    assert "timeout" in inst._warnings[0]
+    # the snapshot is not retried for the remaining resources
+    assert connection.get.call_count == 3
+
+
+def test_config_snapshot_not_used_with_data(connection):
+    resources = get_facts(Facts, data="given").ansible_facts["ansible_network_resources"]
+    assert resources == {"interfaces": "given", "hostname": "given", "legacy": "given"}
+    connection.get.assert_not_called()
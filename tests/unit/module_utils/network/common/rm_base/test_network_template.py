@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2026 Red Hat, Inc.
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Make coding more python3-ish
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+import re
+
+from copy import deepcopy
+from unittest.mock import patch
+
+import pytest
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.rm_base import (
+    network_template,
+)
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.rm_base.network_template import (
+    NetworkTemplate,
+)
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import (
+    dict_merge,
+)
+
+
+class InterfacesTemplate(NetworkTemplate):
+    PARSERS = [
+        {
+            "name": "interface",
+            "getval": r"^interface\s+(?P<name>\S+)$",
+            "result": {"{{ name }}": {"name": "{{ name }}"}},
+            "shared": True,
+        },
+        {
+            "name": "description",
+            "getval": re.compile(
+                r"""
+                \s+description
+                \s+(?P<description>.+)  # free text
+                $""",
+                re.VERBOSE,
+            ),
+            "result": {"{{ name }}": {"description": "{{ description }}"}},
+        },
+        {
+            "name": "repeated",
+            "getval": r"^\s+(?P<word>\w+)\s+(?P=word)$",
+            "result": {"{{ name }}": {"repeated": "{{ word }}"}},
+        },
+        {
+            "name": "ipv4",
+            "getval": r"^\s+ip\saddress\s(?P<ip>\S+)(\s(?P<mask>\S+))?$",
+            "result": {
+                "{{ name }}": {
+                    "ipv4": [{"address": "{{ ip }}", "mask": "{{ mask }}"}],
+                    "l3": True,
+                },
+            },
+        },
+        {
+            "name": "catch_all",
+            "getval": r"^\s+(?P<other>.+)$",
+            "result": {"{{ name }}": {"other": "{{ other }}"}},
+        },
+    ]
+
+    def __init__(self, lines=None, module=None):
+        super(InterfacesTemplate, self).__init__(lines=lines, tmplt=self, module=module)
+
+
+def test_network_template_parse():
+    lines = [
+        "interface Eth1",
+        " description uplink (core)",
+        " ip address 10.0.0.1 255.255.255.0",
+        " ip address 10.0.0.2",
+        " shutdown shutdown",
+        " mtu 9000",
+        "interface Eth2",
+    ]
+    result = InterfacesTemplate(lines=lines).parse()
+    assert result == {
+        "Eth1": {
+            "name": "Eth1",
+            "description": "uplink (core)",
+            "ipv4": [
+                {"address": "10.0.0.1", "mask": "255.255.255.0"},
+                {"address": "10.0.0.2"},
+            ],
+            "l3": True,
+            "repeated": "shutdown",
+            "other": "mtu 9000",
+        },
+        "Eth2": {"name": "Eth2"},
+    }
+
+
+def test_network_template_parse_first_parser_wins():
+    # the catch all parser matches every indented line, it must only be
+    # used for lines none of the parsers ahead of it match
+    result = InterfacesTemplate(lines=["interface Eth1", " description x"]).parse()
+    assert result == {"Eth1": {"name": "Eth1", "description": "x"}}
+
+
+def test_parser_table_dispatch():
+    table = network_template._get_parser_table(InterfacesTemplate.PARSERS)
+    assert table is network_template._get_parser_table(InterfacesTemplate.PARSERS)
+    assert table.match("interface Eth1")[0] == 0
+    # the backreference can not be folded into the dispatch regex
+    assert table.unfolded == [2]
+    assert table.dispatch is not None
+    assert table.match(" description a # b")[1].group("description") == "a # b"
+    assert table.match(" no no")[0] == 2
+    assert table.match(" no shutdown")[0] == 4
+    assert table.match("hostname r1") is None
+
+
+def test_parser_table_rebuilt_for_changed_parsers():
+    parsers = list(InterfacesTemplate.PARSERS)
+    table = network_template._get_parser_table(parsers)
+    parsers.insert(0, {"name": "all", "getval": r"(?P<line>.*)", "result": {}})
+    assert network_template._get_parser_table(parsers) is not table
+    assert network_template._get_parser_table(parsers).match("interface Eth1")[0] == 0
+
+
+def test_parser_table_compile_publishes_complete_table():
+    table = network_template._ParserTable(list(InterfacesTemplate.PARSERS))
+    with patch.object(network_template, "_dispatch_source", side_effect=RuntimeError):
+        with pytest.raises(RuntimeError):
+            table.match("interface Eth1")
+    # a compile that did not finish leaves the table uncompiled
+    assert table.regexes is None
+    assert table.unfolded is None
+    assert table.match("interface Eth1")[0] == 0
+
+
+def test_get_parser():
+    template = InterfacesTemplate()
+    assert template.get_parser("ipv4") is InterfacesTemplate.PARSERS[3]
+    with pytest.raises(IndexError):
+        template.get_parser("missing")
+
+
+def test_render():
+    class Template(NetworkTemplate):
+        PARSERS = [
+            {"name": "mtu", "setval": "mtu {{ mtu }}"},
+            {
+                "name": "description",
+                "setval": "description {{ description }}",
+                "remval": "description",
+            },
+            {"name": "mtu", "setval": "shadowed"},
+        ]
+
+        def __init__(self):
+            super(Template, self).__init__(tmplt=self, prefix={"set": "set"})
+
+    template = Template()
+    assert template.render({"mtu": 9000}, "mtu") == "set mtu 9000"
+    assert template.render({"mtu": 9000}, "mtu", negate=True) == "no mtu 9000"
+    assert template.render({"description": "x"}, "description", negate=True) == "no description"
+
+
+def test_dispatch_source():
+    def source(pattern, flags=0):
+        return network_template._dispatch_source(re.compile(pattern, flags))
+
+    assert source(r"^a(?P<b>[(\]]+)(c)\(") == r"(?:^a(?:[(\]]+)(?:c)\()"
+    assert source(r"^a(?P<b>b)$", re.I) == r"(?i:^a(?:b)$)"
+    assert source(r"a  # comment", re.X) == "(?x:a  # comment\n)"
+    assert source(r"(?i)a") is None
+    assert source(r"(a)\1") is None
+    assert source(r"(?P<a>a)(?P=a)") is None
+    assert source(r"(a)?(?(1)b|c)") is None
+
+
+def test_compiled_result_matches_deepformat():
+    template = NetworkTemplate()
+    tmplt = {
+        "{{ name }}": {
+            "name": "{{ name }}",
+            "static": 1,
+            "undefined": "{{ missing }}",
+            "items": ["{{ name }}", [1, "{{ name }}"], {"{{ name }}": "{{ name }}"}],
+        },
+        "count": "{{ count }}",
+    }
+    data = {"name": "Eth1", "count": "10"}
+    render = network_template._compile_result(tmplt)
+    result = render(template._template, data)
+    assert result == template._deepformat(tmplt, data)
+    assert list(result) == ["count", "Eth1"]
+    # the output shares no containers with the template
+    result["Eth1"]["items"][1].append(2)
+    assert tmplt["{{ name }}"]["items"][1] == [1, "{{ name }}"]
+
+
+def test_deepformat_does_not_share_containers():
+    template = NetworkTemplate()
+    tmplt = {"{{ name }}": {"vlans": [[1]], "static": {"a": [1]}}}
+    result = template._deepformat(tmplt, {"name": "Eth1"})
+    assert result == {"Eth1": {"vlans": [[1]], "static": {"a": [1]}}}
+    result["Eth1"]["vlans"][0].append(2)
+    result["Eth1"]["static"]["a"].append(2)
+    assert tmplt == {"{{ name }}": {"vlans": [[1]], "static": {"a": [1]}}}
+
+
+def test_merge_into_matches_dict_merge():
+    base = {
+        "Eth1": {"name": "Eth1", "mtu": 1500, "ipv4": [{"address": "10.0.0.1"}]},
+        "Eth2": {"name": "Eth2", "vlans": [1, 2]},
+        "dropped": {"a": 1},
+    }
+    others = [
+        {"Eth1": {"mtu": 9000, "ipv4": [{"address": "10.0.0.2"}], "shutdown": True}},
+        {"Eth2": {"vlans": [2, 3], "description": None}},
+        {"Eth3": {"name": "Eth3"}, "dropped": None},
+        {"Eth1": "replaced"},
+    ]
+    expected = base
+    for other in others:
+        expected = dict_merge(expected, other)
+    result = deepcopy(base)
+    for other in others:
+        assert network_template._merge_into(result, deepcopy(other)) is result
+    assert result == expected
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+#
+# (c) 2026 Red Hat, Inc.
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Make coding more python3-ish
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.rm_base import (
+    resource_module_base,
+)
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.rm_base.resource_module import (
+    ResourceModule,
+)
+
+
+BEFORE = [
+    {"name": "Eth1", "mtu": 1500, "description": "old"},
+    {"name": "Eth2", "mtu": 1500},
+]
+
+
+@pytest.fixture(autouse=True)
+def connection():
+    with patch.object(resource_module_base, "get_resource_connection") as get_connection:
+        yield get_connection.return_value
+
+
+def resource_module(state, config, before=None, after=None, **kwargs):
+    module = MagicMock()
+    module.params = {"state": state, "config": config}
+    module.check_mode = False
+    facts_module = MagicMock()
+    facts_module.get_facts.side_effect = [
+        ({"ansible_network_resources": {"interfaces": facts}}, [])
+        for facts in (BEFORE if before is None else before, after)
+    ]
+    rmodule = ResourceModule(
+        module=module, facts_module=facts_module, resource="interfaces", **kwargs
+    )
+    rmodule.commands = ["interface Eth1"]
+    return rmodule
+
+
+def test_after_gathered_by_default():
+    rmodule = resource_module("merged", [{"name": "Eth1", "mtu": 9000}], after=["device"])
+    assert rmodule.result["after"] == ["device"]
+    assert rmodule._facts_module.get_facts.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "state,expected",
+    [
+        (
+            "merged",
+            [
+                {"name": "Eth1", "mtu": 9000, "description": "old"},
+                {"name": "Eth2", "mtu": 1500},
+                {"name": "Eth3", "mtu": 9000},
+            ],
+        ),
+        (
+            "replaced",
+            [
+                {"name": "Eth1", "mtu": 9000},
+                {"name": "Eth2", "mtu": 1500},
+                {"name": "Eth3", "mtu": 9000},
+            ],
+        ),
+        ("overridden", [{"name": "Eth1", "mtu": 9000}, {"name": "Eth3", "mtu": 9000}]),
+    ],
+)
+def test_after_computed(state, expected):
+    want = [{"name": "Eth1", "mtu": 9000}, {"name": "Eth3", "mtu": 9000}]
+    rmodule = resource_module(state, want, compute_after=True, resource_key="name")
+    assert rmodule.result["after"] == expected
+    assert rmodule._facts_module.get_facts.call_count == 1
+
+
+def test_after_computed_dict_resource():
+    want = {"hostname": "r2", "domain": {"name": "example.com"}}
+    before = {"hostname": "r1", "banner": "hello"}
+    rmodule = resource_module("merged", want, before=before, compute_after=True)
+    assert rmodule.result["after"] == {
+        "hostname": "r2",
+        "banner": "hello",
+        "domain": {"name": "example.com"},
+    }
+
+
+def test_after_not_computable():
+    # without a resource key list entries can not be matched
+    rmodule = resource_module(
+        "merged", [{"name": "Eth1", "mtu": 9000}], after=["device"], compute_after=True
+    )
+    assert rmodule.result["after"] == ["device"]
+    rmodule = resource_module(
+        "deleted", [{"name": "Eth1"}], after=["device"], compute_after=True, resource_key="name"
+    )
+    assert rmodule.result["after"] == ["device"]
+
+
+def test_after_check_mode():
+    rmodule = resource_module(
+        "merged", [{"name": "Eth1", "mtu": 9000}], compute_after=True, resource_key="name"
+    )
+    rmodule._module.check_mode = True
+    assert rmodule.result["after"] == BEFORE
+
+
+def test_after_verified():
+    want = [{"name": "Eth1", "mtu": 9000}]
+    after = [{"name": "Eth2", "mtu": 1500}, {"name": "Eth1", "mtu": 9000, "description": "old"}]
+    rmodule = resource_module(
+        "merged", want, after=after, compute_after=True, verify_after=True, resource_key="name"
+    )
+    assert rmodule.result["after"] == [
+        {"name": "Eth1", "mtu": 9000, "description": "old"},
+        {"name": "Eth2", "mtu": 1500},
+    ]
+    rmodule._module.warn.assert_not_called()
+
+    rmodule = resource_module(
+        "merged",
+        want,
+        after=after[:1],
+        compute_after=True,
+        verify_after=True,
+        resource_key="name",
+    )
+    assert rmodule.result["after"] == after[:1]
+    rmodule._module.warn.assert_called_once()
+
+
+def test_index_by_key():
+    rmodule = resource_module("gathered", None)
+    items = [{"name": "Eth1", "mtu": 1}, {"mtu": 2}, {"name": "Eth1", "mtu": 3}]
+    assert rmodule.index_by_key(items) == {"Eth1": {"name": "Eth1", "mtu": 1}}
+    assert rmodule.index_by_key(items, key="mtu") == {1: items[0], 2: items[1], 3: items[2]}
+    assert rmodule.index_by_key(None) == {}
+
+
+def test_compare_compval_memoized():
+    tmplt = MagicMock()
+    tmplt.get_parser.side_effect = lambda name: {
+        "mtu": {"name": "mtu"},
+        "description": {"name": "description", "compval": "settings.description"},
+    }[name]
+    tmplt.render.side_effect = lambda data, parser, negate: "%s%s" % (
+        "no " if negate else "",
+        parser,
+    )
+    rmodule = resource_module("gathered", None, tmplt=tmplt)
+    rmodule.commands = []
+    want = {"mtu": 9000, "settings": {"description": "new"}}
+    have = {"mtu": 1500, "settings": {}}
+    for _ in range(3):
+        rmodule.compare(["mtu", "description"], want=want, have=have)
+    rmodule.compare(["mtu", "description"], want={}, have=have)
+    assert rmodule.commands == ["mtu", "description"] * 3 + ["no mtu"]
+    assert tmplt.get_parser.call_count == 2
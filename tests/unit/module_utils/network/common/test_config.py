@@ -12,8 +12,12 @@ __metaclass__ = type
 
 import re
 
+from unittest.mock import mock_open, patch
+
 import pytest
 
+from ansible.parsing.yaml.objects import AnsibleUnicode
+
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common import config
 
 
@@ -102,9 +106,11 @@ def test_config_items():
         indent=3, contents=RUNNING, ignore_lines=[re.compile(r"\s*no .*")]
     )
     assert len(net_config.items) == 6
-    # above updates the global DEFAULT_IGNORE_LINES_RE list, revert back the global
-    # to it's original value
-    config.DEFAULT_IGNORE_LINES_RE = ORIGINAL_DEFAULT_IGNORE_LINES_RE
+
+    # ignore lines only apply to the config they were given to
+    assert config.DEFAULT_IGNORE_LINES_RE == ORIGINAL_DEFAULT_IGNORE_LINES_RE
+    net_config = config.NetworkConfig(indent=3, contents=RUNNING)
+    assert len(net_config.items) == 10
 
 
 def test_config_get_block():
@@ -172,3 +178,216 @@ def test_updates_repeat_parents():
     for generated_diff_line, candidate_diff_line in zip(diff_list, expected_diff):
         print(generated_diff_line, candidate_diff_line)
         assert generated_diff_line == candidate_diff_line.strip()
+
+
+def test_config_line_hashable():
+    net_config = config.NetworkConfig(indent=3, contents=RUNNING)
+    lines = net_config.items
+
+    assert lines[1].line == "interface Ethernet1 speed auto"
+    assert lines[1] == config.NetworkConfig(indent=3, contents=RUNNING).items[1]
+    assert lines[1] != lines[5]
+    assert len(set(lines + config.NetworkConfig(indent=3, contents=RUNNING).items)) == 10
+    assert hash(lines[1]) == hash(lines[1].line)
+
+
+def test_config_line_reset_parents():
+    line = config.ConfigLine("   speed auto")
+    assert line.line == "speed auto"
+
+    line._parents = [config.ConfigLine("interface Ethernet1")]
+    assert line.line == "interface Ethernet1 speed auto"
+
+
+def test_difference_line_match():
+    running = config.NetworkConfig(indent=3, contents=RUNNING)
+    candidate = config.NetworkConfig(
+        indent=3, contents=RUNNING.replace("no lldp transmit", "lldp transmit")
+    )
+
+    updates = candidate.difference(running)
+    assert config.dumps(updates, "commands") == "interface Ethernet2\nlldp transmit"
+
+
+def test_config_line_shares_parents():
+    net_config = config.NetworkConfig(indent=3, contents=RUNNING)
+    lines = net_config.items
+
+    assert lines[1]._parents is lines[2]._parents
+    assert lines[1]._parents == (lines[0],)
+    assert lines[1].text is lines[5].text
+    assert not hasattr(lines[1], "__dict__")
+
+
+def test_config_line_str_subclass():
+    line = config.ConfigLine(AnsibleUnicode("  speed auto"))
+    assert line.raw == "  speed auto"
+    assert line.text == "speed auto"
+
+    net_config = config.NetworkConfig(indent=3, contents=RUNNING)
+    net_config.add([AnsibleUnicode("speed 100")], parents=[AnsibleUnicode("interface Ethernet1")])
+    assert net_config.get_object(["interface Ethernet1", "speed 100"]).raw == "   speed 100"
+
+
+def test_config_load_from_lines(tmp_path):
+    expected = [item.line for item in config.NetworkConfig(indent=3, contents=RUNNING).items]
+
+    net_config = config.NetworkConfig(indent=3, contents=RUNNING.split("\n"))
+    assert [item.line for item in net_config.items] == expected
+    assert net_config.config_text is None
+
+    path = tmp_path / "running.cfg"
+    path.write_text(RUNNING)
+    net_config = config.NetworkConfig(indent=3)
+    with open(str(path)) as f:
+        net_config.load(f)
+    assert [item.line for item in net_config.items] == expected
+
+    net_config = config.NetworkConfig(indent=3)
+    with patch("builtins.open", mock_open(read_data=RUNNING)) as m_open:
+        net_config.loadfp(str(path))
+    assert [item.line for item in net_config.items] == expected
+    assert net_config.config_text == RUNNING
+    m_open.return_value.read.assert_not_called()
+
+
+def test_config_parse_braces():
+    net_config = config.NetworkConfig(indent=4, contents="system {\n    host-name r1;\n}\n")
+    # lines made of delimiters only are dropped
+    assert [item.line for item in net_config.items] == ["system {", "system { host-name r1;"]
+
+
+def test_ignore_lines_matcher():
+    matcher = config._ignore_lines_matcher(
+        ("!", "#"),
+        (
+            re.compile(r"Building configuration"),
+            re.compile(r"(\w+) \1"),
+            re.compile(r"ntp clock", re.I),
+        ),
+    )
+
+    assert matcher("! comment")
+    assert matcher("Building configuration...")
+    assert matcher("end end")
+    assert matcher("NTP clock-period 17")
+    assert not matcher("end")
+    assert not matcher("hostname r1")
+
+
+def test_ignore_lines_matcher_cached():
+    first = config.NetworkConfig(indent=3, ignore_lines=[r"\s*no .*"])
+    second = config.NetworkConfig(indent=3, ignore_lines=[r"\s*no .*"])
+    assert first._get_ignore_matcher() is second._get_ignore_matcher()
+    assert first._get_ignore_matcher() is not config.NetworkConfig()._get_ignore_matcher()
+
+
+def test_config_add_ignore_lines():
+    net_config = config.NetworkConfig(indent=1, ignore_lines=[r"\s*no .*"])
+    net_config.add(["no shutdown", "mtu 9000", "! comment"], parents=["interface Ethernet1"])
+    assert [item.line for item in net_config.items] == [
+        "interface Ethernet1",
+        "interface Ethernet1 mtu 9000",
+    ]
+
+
+def test_config_get_object():
+    net_config = config.NetworkConfig(indent=3, contents=RUNNING)
+
+    obj = net_config.get_object(["interface Ethernet2", "no lldp transmit"])
+    assert obj is net_config.items[7]
+    assert net_config.get_object(["interface Ethernet2", "no lldp receive"]) is None
+    assert net_config.get_object(["no lldp transmit"]) is None
+    assert net_config.items[4]["no switchport"] is net_config.items[6]
+    with pytest.raises(KeyError):
+        net_config.items[4]["no lldp receive"]
+
+    # the index follows items added after the first lookup and a reload
+    net_config.add(["mtu 9000"], parents=["interface Ethernet2"])
+    assert net_config.get_object(["interface Ethernet2", "mtu 9000"]) is net_config.items[-1]
+    net_config.load("hostname r1")
+    assert net_config.get_object(["interface Ethernet2"]) is None
+    assert net_config.get_object(["hostname r1"]) is net_config.items[0]
+
+
+def test_config_get_object_after_changes():
+    net_config = config.NetworkConfig(
+        indent=1, contents="hostname a\ninterface Ethernet1\n mtu 1500"
+    )
+    assert net_config.get_object(["hostname a"]) is net_config.items[0]
+
+    net_config.items.pop(0)
+    net_config.items.append(config.ConfigLine("hostname b"))
+    assert net_config.get_object(["hostname a"]) is None
+    assert net_config.get_object(["hostname b"]) is net_config.items[-1]
+
+    net_config.items.insert(0, config.ConfigLine("logging on"))
+    assert net_config.get_object(["logging on"]) is net_config.items[0]
+    net_config.add(["logging on"])
+    assert len(net_config.items) == 4
+
+    interface = net_config.get_object(["interface Ethernet1"])
+    interface.text = "interface Ethernet2"
+    assert net_config.get_object(["interface Ethernet1"]) is None
+    assert net_config.get_object(["interface Ethernet2"]) is interface
+    assert net_config.get_object(["interface Ethernet2", "mtu 1500"]).line == (
+        "interface Ethernet2 mtu 1500"
+    )
+
+    interface.child_objs[0].text = "mtu 9000"
+    assert interface["mtu 9000"] is interface.child_objs[0]
+    net_config.add(["mtu 1500"], parents=["interface Ethernet2"])
+    assert [item.text for item in interface.child_objs] == ["mtu 9000", "mtu 1500"]
+
+
+def test_config_add_existing():
+    net_config = config.NetworkConfig(indent=1)
+    net_config.add(["hostname r1", "hostname r1"])
+    net_config.add(["description a", "description a"], parents=["interface Ethernet1"])
+    net_config.add(["description a", "mtu 9000"], parents=["interface Ethernet1"])
+    net_config.add(["hostname r1"])
+
+    assert str(net_config) == "\n".join(
+        ["hostname r1", "interface Ethernet1", " description a", " mtu 9000"]
+    )
+
+
+def test_difference_replace_block():
+    running = config.NetworkConfig(indent=3, contents=RUNNING)
+    candidate = config.NetworkConfig(
+        indent=3, contents=RUNNING.replace("no lldp transmit", "lldp transmit")
+    )
+
+    updates = candidate.difference(running, replace="block")
+    assert config.dumps(updates, "commands").split("\n") == [
+        "interface Ethernet2",
+        "speed auto",
+        "no switchport",
+        "lldp transmit",
+    ]
+    assert config.dumps(updates, "block") == "\n".join(
+        ["interface Ethernet2", "   speed auto", "   no switchport", "   lldp transmit", "end"]
+    )
+
+
+def test_expand_block_skips_repeated_lines():
+    net_config = config.NetworkConfig(indent=1, contents="router ospf 1\n exit\n exit\n area 0")
+    block = net_config.get_block(["router ospf 1"])
+    assert [item.text for item in block] == ["router ospf 1", "exit", "area 0"]
+
+
+def test_config_sha1():
+    running = RUNNING + "\nBuilding configuration\n"
+    assert config.config_sha1(running) == config.NetworkConfig(contents=running).sha1
+    assert (
+        config.config_sha1(running.splitlines(True)) == config.NetworkConfig(contents=RUNNING).sha1
+    )
+
+    ignore_lines = [r"\s*no .*"]
+    assert (
+        config.config_sha1(running, ignore_lines=ignore_lines)
+        == config.NetworkConfig(contents=running, ignore_lines=ignore_lines).sha1
+    )
+    assert config.config_sha1(running, ignore_lines=ignore_lines) != config.config_sha1(running)
+
+    assert config.config_sha1(None) == config.config_sha1("") == config.NetworkConfig().sha1
@@ -10,6 +10,8 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import ast
+
 from copy import deepcopy
 from unittest.mock import MagicMock
 
@@ -404,6 +406,94 @@ def test_template():
     assert "foo" == tmpl("{{ test }}", {"test": "foo"})
 
 
+@pytest.mark.parametrize(
+    "value,variables,expected",
+    [
+        ("{{ name }}", {"name": "Ethernet1"}, "Ethernet1"),
+        ("{{name}}", {"name": 10}, 10),
+        ("{{ name }}", {"name": "[1, 2]"}, [1, 2]),
+        ("{{ name }}", {"name": ""}, None),
+        ("{{ name }}", {"name": None}, None),
+        ("{{ true }}", {"true": "x"}, True),
+        ("{{ range }}", {}, "<class 'range'>"),
+        ("vlan {{ name }}", {"name": "10"}, "vlan 10"),
+    ],
+)
+def test_template_simple_variable(value, variables, expected):
+    tmpl = utils.JinjaTemplate()
+    assert tmpl(value, variables) == expected
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "9000",
+        "-5",
+        "007",
+        "1.5",
+        "1e3",
+        "10.1.1.1",
+        "1/0/1",
+        "GigabitEthernet0/1",
+        "True",
+        "Trueish",
+        "None",
+        "False, 1",
+        "'x'",
+        "[1, '1/2']",
+        "{1: 2}",
+        "(1.5, 2.5)",
+        "b'x'",
+        "f'x'",
+        "00:11:22:33:44:55",
+        " 12",
+        "1 # comment",
+        "\n1",
+        "1_000",
+        "0x1F",
+    ],
+)
+def test_literal_eval(value):
+    try:
+        expected = ast.literal_eval(value)
+    except Exception:
+        expected = value
+
+    result = utils._literal_eval(value)
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+def test_template_simple_variable_undefined():
+    tmpl = utils.JinjaTemplate()
+    assert tmpl("{{ name }}", {}, fail_on_undefined=False) is None
+    with pytest.raises(utils.UndefinedError):
+        tmpl("{{ name }}", {})
+
+
+def test_template_compiled_once():
+    utils._compile_template.cache_clear()
+    first = utils.JinjaTemplate()
+    second = utils.JinjaTemplate()
+
+    assert first("{{ a ~ b }}", {"a": "x", "b": "y"}) == "xy"
+    assert second("{{ a ~ b }}", {"a": "y", "b": "z"}) == "yz"
+    assert utils._compile_template.cache_info().misses == 1
+
+
+def test_template_env_per_instance():
+    utils._compile_template.cache_clear()
+    first = utils.JinjaTemplate()
+    second = utils.JinjaTemplate()
+    assert first("{{ a | upper }}", {"a": "x"}) == "X"
+
+    first.env.filters["upper"] = lambda value: "first"
+    assert first("{{ a | upper }}", {"a": "x"}) == "first"
+    assert second("{{ a | upper }}", {"a": "x"}) == "X"
+    assert first.env is not second.env
+    assert utils._compile_template.cache_info().misses == 1
+
+
 def test_to_masklen():
     assert 24 == to_masklen("255.255.255.0")
 
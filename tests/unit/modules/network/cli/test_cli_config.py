@@ -19,11 +19,10 @@ from ansible_collections.ansible.netcommon.tests.unit.modules.utils import set_m
 from .cli_module import TestCliModule
 
 
-# NetworkConfig(ignore_lines=[...]) permanently adds the supplied patterns to
-# the module-level DEFAULT_IGNORE_LINES_RE set (see module_utils/network/common
-# /config.py). Snapshot/restore it around each test the same way
-# tests/unit/module_utils/network/common/test_config.py does, so a custom
-# diff_ignore_lines pattern used in one test can't leak into another.
+# diff_ignore_lines are kept per config and no longer added to the module-level
+# DEFAULT_IGNORE_LINES_RE set (see module_utils/network/common/config.py).
+# Snapshot/restore it around each test anyway, so a regression there can't
+# leak a custom diff_ignore_lines pattern from one test into another.
 ORIGINAL_DEFAULT_IGNORE_LINES_RE = network_common_config.DEFAULT_IGNORE_LINES_RE.copy()
 
 
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Red Hat
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import stat
+import tempfile
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from ansible.plugins.loader import cache_loader
+
+from ansible_collections.ansible.netcommon.plugins.cache import jsonfile
+
+
+class TestJsonFileCacheModule(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = self._get_cache("host1")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _get_cache(self, prefix, **options):
+        cache = cache_loader.get("ansible.netcommon.jsonfile")
+        options.update({"cache_dir": self.tmpdir, "prefix": prefix})
+        cache.set_options(direct=options)
+        return cache
+
+    def test_persistent_is_true(self):
+        self.assertTrue(self.cache._persistent)
+
+    def test_populate_and_lookup(self):
+        self.cache.populate(b"show version", "Version 1.0")
+        self.assertEqual(self.cache.lookup(b"show version"), "Version 1.0")
+        self.assertEqual(self.cache.keys(), ["show version"])
+
+    def test_persists_across_instances(self):
+        self.cache.populate(b"show version", "Version 1.0")
+        other = self._get_cache("host1")
+        self.assertEqual(other.lookup(b"show version"), "Version 1.0")
+
+    def test_entries_are_per_host(self):
+        self.cache.populate(b"show version", "Version 1.0")
+        other = self._get_cache("host2")
+        self.assertIsNone(other.lookup(b"show version"))
+
+    def test_files_private_to_user(self):
+        self.cache.populate(b"show version", "Version 1.0")
+        host_dir = os.path.join(self.tmpdir, "host1")
+        self.assertEqual(stat.S_IMODE(os.stat(host_dir).st_mode), 0o700)
+        for name in os.listdir(host_dir):
+            mode = os.stat(os.path.join(host_dir, name)).st_mode
+            self.assertEqual(stat.S_IMODE(mode), 0o600)
+
+    def test_ttl_expiry(self):
+        with patch.object(jsonfile.time, "time", return_value=1000.0):
+            self.cache.populate(b"show version", "Version 1.0")
+        with patch.object(jsonfile.time, "time", return_value=1599.0):
+            self.assertEqual(self.cache.lookup(b"show version"), "Version 1.0")
+        with patch.object(jsonfile.time, "time", return_value=1600.0):
+            self.assertIsNone(self.cache.lookup(b"show version"))
+        self.assertEqual(self.cache.keys(), [])
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_ttl_from_config(self):
+        env = {"ANSIBLE_NETWORK_CACHE_TTL": "0", "ANSIBLE_NETWORK_JSONFILE_CACHE_TTL": "30"}
+        with patch.dict(os.environ, env):
+            cache = self._get_cache("host1")
+        self.assertEqual(cache.get_option("ttl"), 30)
+
+    def test_no_ttl(self):
+        cache = self._get_cache("host1", ttl=0)
+        cache.populate(b"show version", "Version 1.0")
+        with patch.object(jsonfile.time, "time", return_value=2**40):
+            self.assertEqual(cache.lookup(b"show version"), "Version 1.0")
+
+    def test_corrupted_entry_is_discarded(self):
+        self.cache.populate(b"show version", "Version 1.0")
+        path = self.cache._path(b"show version")
+        with open(path) as f:
+            entry = json.load(f)
+        entry["value"] = "Version 2.0"
+        with open(path, "w") as f:
+            json.dump(entry, f)
+
+        self.assertIsNone(self.cache.lookup(b"show version"))
+        self.assertFalse(os.path.exists(path))
+
+    def test_unreadable_entry_is_a_miss(self):
+        self.cache.populate(b"show version", "Version 1.0")
+        with open(self.cache._path(b"show version"), "w") as f:
+            f.write("{not json")
+        self.assertIsNone(self.cache.lookup(b"show version"))
+
+    def test_delete(self):
+        self.cache.populate(b"show version", "Version 1.0")
+        self.cache.populate(b"show clock", "12:00")
+
+        # keys() returns text, deleting by it removes the entry stored for bytes
+        self.cache.delete("show clock")
+        self.cache.delete(b"show missing")
+
+        self.assertEqual(self.cache.keys(), ["show version"])
+
+    def test_invalidate(self):
+        self.cache.populate(b"show version", "Version 1.0")
+        self.cache.populate(b"show clock", "12:00")
+        other = self._get_cache("host2")
+        other.populate(b"show version", "Version 2.0")
+
+        self.cache.invalidate()
+
+        self.assertEqual(self.cache.keys(), [])
+        self.assertEqual(other.lookup(b"show version"), "Version 2.0")
+
+    def test_stats(self):
+        self.cache.populate(b"show version", "Version 1.0")
+        self.cache.lookup(b"show version")
+        self.cache.lookup(b"show clock")
+        self.assertEqual(
+            self.cache.stats(),
+            {"entries": 1, "hits": 1, "misses": 1, "evictions": 0},
+        )
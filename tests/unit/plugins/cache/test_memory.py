@@ -8,8 +8,14 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import os
+
 from unittest import TestCase
+from unittest.mock import patch
+
+from ansible.plugins.loader import cache_loader
 
+from ansible_collections.ansible.netcommon.plugins.cache import memory
 from ansible_collections.ansible.netcommon.plugins.cache.memory import CacheModule
 
 
@@ -43,6 +49,14 @@ class TestMemoryCacheModule(TestCase):
         self.assertIsNone(self.cache.get("a"))
         self.assertEqual(list(self.cache.keys()), [])
 
+    def test_delete(self):
+        self.cache.set("a", "xx")
+        self.cache.set("b", "yyy")
+        self.cache.delete("a")
+        self.cache.delete("missing")
+        self.assertEqual(list(self.cache.keys()), ["b"])
+        self.assertEqual(self.cache.stats()["bytes"], 4)
+
     def test_populate_and_lookup(self):
         self.cache.populate("host1", {"os": "eos"})
         self.assertEqual(self.cache.lookup("host1"), {"os": "eos"})
@@ -62,3 +76,72 @@ class TestMemoryCacheModule(TestCase):
         other = CacheModule()
         self.cache.set("key", "value")
         self.assertIsNone(other.get("key"))
+
+    def test_lru_eviction_max_entries(self):
+        self.cache._max_entries = 2
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        self.assertEqual(sorted(self.cache.keys()), ["a", "c"])
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_lru_eviction_max_bytes(self):
+        self.cache._max_bytes = 20
+        self.cache.set("a", "x" * 9)
+        self.cache.set("b", "y" * 9)
+        self.assertEqual(self.cache.stats()["bytes"], 20)
+        self.cache.set("c", "z" * 9)
+        self.assertEqual(sorted(self.cache.keys()), ["b", "c"])
+        self.assertEqual(self.cache.stats()["bytes"], 20)
+
+    def test_size_counted_in_bytes(self):
+        self.cache.set("a", "\u00e9" * 5)
+        self.cache.set(b"b", {"k": "v"})
+        self.assertEqual(self.cache.stats()["bytes"], 1 + 10 + 1 + len('{"k": "v"}'))
+
+        self.cache._max_bytes = 20
+        self.cache.set("c", "\u00e9" * 9)
+        self.assertEqual(list(self.cache.keys()), ["c"])
+        self.assertEqual(self.cache.stats()["bytes"], 19)
+
+    def test_entry_larger_than_max_bytes_not_kept(self):
+        self.cache._max_bytes = 10
+        self.cache.set("a", "x" * 20)
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats()["bytes"], 0)
+
+    def test_ttl_expiry(self):
+        self.cache._ttl = 10
+        with patch.object(memory.time, "monotonic", return_value=100.0):
+            self.cache.set("a", 1)
+        with patch.object(memory.time, "monotonic", return_value=109.0):
+            self.assertEqual(self.cache.get("a"), 1)
+        with patch.object(memory.time, "monotonic", return_value=110.0):
+            self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(list(self.cache.keys()), [])
+
+    def test_overwrite_updates_size(self):
+        self.cache.set("key", "old")
+        self.cache.set("key", "newer")
+        self.assertEqual(self.cache.stats()["bytes"], len("key") + len("newer"))
+
+    def test_stats(self):
+        self.cache.set("a", "1")
+        self.cache.lookup("a")
+        self.cache.lookup("b")
+        self.cache.flush()
+        self.assertEqual(
+            self.cache.stats(),
+            {"entries": 0, "bytes": 0, "hits": 1, "misses": 1, "evictions": 0},
+        )
+
+    def test_set_options_from_config(self):
+        env = {"ANSIBLE_NETWORK_CACHE_MAX_ENTRIES": "1", "ANSIBLE_NETWORK_CACHE_TTL": "30"}
+        with patch.dict(os.environ, env):
+            cache = cache_loader.get("ansible.netcommon.memory")
+            cache.set("a", 1)
+            cache.set("b", 2)
+            cache.set_options()
+        self.assertEqual(cache.get_option("ttl"), 30)
+        self.assertEqual(list(cache.keys()), ["b"])
@@ -11,8 +11,10 @@ __metaclass__ = type
 
 import json
 import re
+import socket
+import threading
 
-from unittest.mock import MagicMock, PropertyMock, patch
+from unittest.mock import MagicMock, PropertyMock, call, patch
 
 import pytest
 
@@ -21,6 +23,7 @@ from ansible.module_utils.common.text.converters import to_text
 from ansible.playbook.play_context import PlayContext
 from ansible.plugins.loader import cache_loader, connection_loader
 
+from ansible_collections.ansible.netcommon.plugins.connection import network_cli
 from ansible_collections.ansible.netcommon.plugins.connection.network_cli import terminal_loader
 
 
@@ -43,6 +46,25 @@ def _make_terminal_mock(
     return terminal
 
 
+def _make_libssh_shell(chunks):
+    """Build a libssh channel mock that returns each chunk on a separate read."""
+    shell = MagicMock()
+    pending = list(chunks)
+    ready = []
+
+    def poll(timeout=-1, stderr=0):
+        if not ready and pending:
+            ready.append(pending.pop(0))
+        return len(ready[0]) if ready else 0
+
+    def read_nonblocking(size=1024, stderr=0):
+        return ready.pop() if ready else b""
+
+    shell.poll.side_effect = poll
+    shell.read_nonblocking.side_effect = read_nonblocking
+    return shell
+
+
 @pytest.fixture(name="conn")
 def plugin_fixture(monkeypatch):
     pc = PlayContext()
@@ -186,16 +208,16 @@ def test_network_cli_send(conn, response, ssh_type):
             "terminal_stdout_re": [{"pattern": "device#"}],
         }
     )
-    mock__shell = MagicMock()
+    if conn.ssh_type == "paramiko":
+        mock__shell = MagicMock()
+        mock__shell.recv.side_effect = [*response, None]
+    elif conn.ssh_type == "libssh":
+        mock__shell = _make_libssh_shell(response)
 
     conn._terminal = MagicMock()
     conn._ssh_shell = mock__shell
     conn._connected = True
 
-    if conn.ssh_type == "paramiko":
-        mock__shell.recv.side_effect = [*response, None]
-    elif conn.ssh_type == "libssh":
-        mock__shell.read_bulk_response.side_effect = [*response, None]
     conn.send(b"command")
 
     mock__shell.sendall.assert_called_with(b"command\r")
@@ -216,6 +238,16 @@ def test_network_cli_close(conn):
     assert conn._ssh_type_conn is None
 
 
+def test_network_cli_close_logs_cache_statistics(conn):
+    conn._cache = MagicMock()
+    conn._cache.stats.return_value = {"hits": 2, "misses": 1}
+    conn.queue_message = MagicMock()
+
+    conn.close()
+
+    conn.queue_message.assert_any_call("vvvv", "command cache statistics: {'hits': 2, 'misses': 1}")
+
+
 # ---- Note - Added as part of parammiko implicit PR - remove post 2028
 def test_network_cli_close_when_not_connected(conn):
     """close() when _connected is False should not call terminal or close ssh_type_conn."""
@@ -420,6 +452,369 @@ def test_network_cli_find_error_no_match(conn):
     assert found is False
 
 
+def test_network_cli_find_prompt_from_pos(conn):
+    conn._terminal_stdout_re = [re.compile(rb"device#")]
+    conn._log_messages = MagicMock()
+
+    assert conn._find_prompt(b"device#output", 7) is False
+    assert conn._find_prompt(b"device#output\ndevice#", 7) is True
+
+
+def test_network_cli_get_prompt_scan_overlap(conn):
+    conn._terminal_stdout_re = [re.compile(rb"device#")]
+    conn._terminal_stderr_re = [re.compile(rb"% ?Error")]
+
+    assert conn._get_prompt_scan_overlap() == 7
+    assert conn._get_prompt_scan_overlap([b"\\[confirm\\]"]) == 9
+
+    conn._terminal_stdout_re = [re.compile(rb"[\w-]+#\s*$")]
+    assert conn._get_prompt_scan_overlap() == network_cli.MAX_PROMPT_SCAN_OVERLAP
+
+
+def test_network_cli_get_prompt_scan_overlap_without_regex_parser(conn):
+    conn._terminal_stdout_re = [re.compile(rb"device#")]
+    conn._terminal_stderr_re = []
+
+    with patch.object(network_cli, "sre_parse", None):
+        assert conn._get_prompt_scan_overlap() == network_cli.MAX_PROMPT_SCAN_OVERLAP
+
+
+def test_network_cli_receive_libssh_scans_incrementally(conn):
+    conn.set_options(
+        direct={
+            "ssh_type": "libssh",
+            "terminal_stderr_re": [{"pattern": "^ERROR"}],
+            "terminal_stdout_re": [{"pattern": "device#$"}],
+        }
+    )
+    conn._terminal = _make_terminal_mock()
+    chunks = [b"command\n"] + [b"line %d\n" % i for i in range(50)] + [b"dev", b"ice#"]
+    conn._ssh_shell = _make_libssh_shell(chunks)
+    conn._connected = True
+
+    with patch.object(conn, "_find_prompt", wraps=conn._find_prompt) as find_prompt:
+        response = conn.receive(b"command")
+
+    assert response == b"\n".join(b"line %d" % i for i in range(50))
+    assert conn._matched_prompt == b"device#"
+    # only the tail overlapping the previous read is scanned again
+    scan_positions = [call.args[1] for call in find_prompt.call_args_list]
+    assert scan_positions == sorted(scan_positions)
+    assert scan_positions[-1] > 0
+
+
+def test_network_cli_receive_libssh_check_all_prompts_in_one_window(conn):
+    conn.set_options(direct={"ssh_type": "libssh", "terminal_stdout_re": [{"pattern": "device#$"}]})
+    conn._terminal = _make_terminal_mock()
+    banner = b"\n".join(b"banner line %d" % i for i in range(10))
+    chunks = [b"command\nUsername: \nPassword: \n" + banner, b"\ndevice#"]
+    conn._ssh_shell = _make_libssh_shell(chunks)
+    conn._connected = True
+
+    conn.receive(
+        b"command",
+        prompts=[b"Username:", b"Password:"],
+        answer=[b"admin", b"secret"],
+        check_all=True,
+    )
+
+    # the second prompt is further back than the scan overlap of the next read
+    sent = [call.args[0] for call in conn._ssh_shell.sendall.call_args_list]
+    assert sent == [b"admin\r", b"secret\r"]
+
+
+def test_network_cli_receive_paramiko_reads_up_to_buffer_size(conn):
+    conn.set_options(
+        direct={
+            "ssh_type": "paramiko",
+            "network_cli_recv_buffer_size": 4096,
+            "persistent_buffer_read_timeout": 0,
+            "terminal_stdout_re": [{"pattern": "device#$"}],
+        }
+    )
+    conn._terminal = _make_terminal_mock()
+    conn._ssh_shell = MagicMock()
+    conn._connected = True
+    output = b"\n".join(b"line %d" % i for i in range(100))
+    conn._ssh_shell.recv.side_effect = [b"command\n" + output + b"\ndev", b"ice#"]
+
+    response = conn.receive(b"command")
+
+    assert response == output
+    assert conn._matched_prompt == b"device#"
+    conn._ssh_shell.recv.assert_called_with(4096)
+    # the window only holds the new data and the overlapping tail
+    assert conn._last_recv_window.endswith(b"\ndevice#")
+    assert len(conn._last_recv_window) < len(output)
+
+
+def test_network_cli_receive_libssh_waits_on_channel_after_prompt(conn):
+    conn.set_options(
+        direct={
+            "ssh_type": "libssh",
+            "persistent_buffer_read_timeout": 0.5,
+            "terminal_stdout_re": [{"pattern": "device#"}],
+        }
+    )
+    conn._terminal = _make_terminal_mock()
+    # a prompt look-alike in the middle of the output is followed by more data
+    conn._ssh_shell = _make_libssh_shell([b"command\nfoo device# bar\n", b"baz\ndevice#"])
+    conn._connected = True
+
+    with patch("time.sleep") as mock_sleep:
+        response = conn.receive(b"command")
+
+    assert response == b"baz"
+    mock_sleep.assert_not_called()
+    assert max(c.kwargs["timeout"] for c in conn._ssh_shell.poll.call_args_list) == 50
+
+
+def test_network_cli_receive_libssh_channel_closed(conn):
+    conn.set_options(direct={"ssh_type": "libssh", "terminal_stdout_re": [{"pattern": "device#"}]})
+    conn._terminal = _make_terminal_mock()
+    conn._ssh_shell = MagicMock()
+    conn._ssh_shell.poll.return_value = -127
+    conn._ssh_shell.read_nonblocking.return_value = None
+    conn._connected = True
+
+    assert conn.receive(b"command") is None
+
+
+def test_network_cli_receive_libssh_channel_error(conn):
+    errors = pytest.importorskip("pylibsshext.errors")
+    conn.set_options(direct={"ssh_type": "libssh", "terminal_stdout_re": [{"pattern": "device#"}]})
+    conn._terminal = _make_terminal_mock()
+    conn._ssh_shell = MagicMock()
+    conn._ssh_shell.poll.side_effect = errors.LibsshChannelException("channel error")
+    conn._connected = True
+
+    assert conn.receive(b"command") is None
+
+
+def test_network_cli_receive_libssh_channel_error_after_prompt(conn):
+    errors = pytest.importorskip("pylibsshext.errors")
+    conn.set_options(
+        direct={
+            "ssh_type": "libssh",
+            "persistent_buffer_read_timeout": 0.5,
+            "terminal_stdout_re": [{"pattern": "device#"}],
+        }
+    )
+    conn._terminal = _make_terminal_mock()
+    conn._ssh_shell = _make_libssh_shell([b"command\noutput\ndevice#"])
+    poll = conn._ssh_shell.poll.side_effect
+    conn._ssh_shell.poll.side_effect = [poll(), errors.LibsshChannelException("channel error")]
+    conn._connected = True
+
+    assert conn.receive(b"command") == b"output"
+
+
+def test_network_cli_receive_paramiko_buffer_read_timeout(conn):
+    conn.set_options(
+        direct={
+            "ssh_type": "paramiko",
+            "persistent_command_timeout": 30,
+            "persistent_buffer_read_timeout": 0.5,
+            "terminal_stdout_re": [{"pattern": "device#"}],
+        }
+    )
+    conn._terminal = _make_terminal_mock()
+    conn._ssh_shell = MagicMock()
+    conn._ssh_shell.recv.side_effect = [b"command\noutput\ndevice#", socket.timeout]
+    conn._connected = True
+
+    assert conn.receive(b"command") == b"output"
+    assert conn._ssh_shell.settimeout.call_args_list[-2:] == [call(0.5), call(30)]
+
+
+def test_network_cli_deadline():
+    assert network_cli._Deadline(0).remaining() is None
+    assert network_cli._Deadline(0).expired() is False
+
+    with patch.object(network_cli.time, "monotonic", side_effect=[100.0, 104.0, 111.0]):
+        deadline = network_cli._Deadline(10)
+        assert deadline.remaining() == 6.0
+        assert deadline.expired() is True
+
+
+def test_network_cli_receive_libssh_error_reports_full_response(conn):
+    conn.set_options(
+        direct={
+            "ssh_type": "libssh",
+            "terminal_stderr_re": [{"pattern": "% ?Error"}],
+            "terminal_stdout_re": [{"pattern": "device#$"}],
+        }
+    )
+    conn._terminal = _make_terminal_mock()
+    filler = b"".join(b"detail line %d\n" % i for i in range(20))
+    chunks = [b"command\n% Error: invalid input\n", filler, b"more detail line\ndevice#"]
+    conn._ssh_shell = _make_libssh_shell(chunks)
+    conn._connected = True
+
+    with pytest.raises(AnsibleConnectionFailure) as excinfo:
+        conn.receive(b"command")
+
+    assert excinfo.value.message == to_text(b"".join(chunks))
+
+
+def test_network_cli_receive_libssh_command_timeout(conn):
+    conn.set_options(
+        direct={
+            "ssh_type": "libssh",
+            "persistent_command_timeout": 5,
+            "terminal_stdout_re": [{"pattern": "device#"}],
+        }
+    )
+    conn._terminal = _make_terminal_mock()
+    conn._ssh_shell = MagicMock()
+    conn._connected = True
+    clock = [0.0]
+
+    def poll(timeout=-1, stderr=0):
+        clock[0] += timeout / 1000.0
+        return 0
+
+    conn._ssh_shell.poll.side_effect = poll
+
+    with patch.object(network_cli.time, "monotonic", side_effect=lambda: clock[0]):
+        with pytest.raises(AnsibleConnectionFailure) as excinfo:
+            conn.receive(b"command")
+
+    assert "command timeout triggered" in str(excinfo.value)
+    # the wait is split in slices so the GIL held by poll is released in between
+    timeouts = [c.kwargs["timeout"] for c in conn._ssh_shell.poll.call_args_list]
+    assert max(timeouts) == 50
+    assert 5000 <= sum(timeouts) <= 5001
+
+
+def test_network_cli_wait_for_data_slices(conn):
+    conn._ssh_shell = MagicMock()
+    clock = [0.0]
+
+    def poll(timeout=-1, stderr=0):
+        clock[0] += timeout / 1000.0
+        return 12 if clock[0] >= 0.12 else 0
+
+    conn._ssh_shell.poll.side_effect = poll
+
+    with patch.object(network_cli.time, "monotonic", side_effect=lambda: clock[0]):
+        assert conn._wait_for_data(1) is True
+        assert [c.kwargs["timeout"] for c in conn._ssh_shell.poll.call_args_list] == [50, 50, 50]
+        conn._ssh_shell.poll.reset_mock()
+        clock[0] = 0.0
+        conn._ssh_shell.poll.side_effect = lambda timeout=-1: 0
+        assert conn._wait_for_data(0) is False
+        conn._ssh_shell.poll.assert_called_once_with(timeout=0)
+
+
+def test_network_cli_receive_paramiko_command_timeout(conn):
+    conn.set_options(
+        direct={
+            "ssh_type": "paramiko",
+            "persistent_command_timeout": 5,
+            "terminal_stdout_re": [{"pattern": "device#"}],
+        }
+    )
+    conn._terminal = _make_terminal_mock()
+    conn._ssh_shell = MagicMock()
+    conn._ssh_shell.recv.side_effect = [b"partial output", socket.timeout]
+    conn._connected = True
+
+    with pytest.raises(AnsibleConnectionFailure) as excinfo:
+        conn.receive(b"command")
+
+    assert "command timeout triggered" in str(excinfo.value)
+    assert 0 < conn._ssh_shell.settimeout.call_args.args[0] <= 5
+
+
+@pytest.mark.parametrize("ssh_type", ["paramiko", "libssh"])
+def test_network_cli_receive_from_worker_thread(conn, ssh_type):
+    conn.set_options(
+        direct={
+            "ssh_type": ssh_type,
+            "persistent_buffer_read_timeout": 0.5,
+            "terminal_stdout_re": [{"pattern": "device#"}],
+        }
+    )
+    conn._terminal = _make_terminal_mock()
+    chunks = [b"command\nfoo device# bar\n", b"output\ndevice#"]
+    if ssh_type == "libssh":
+        conn._ssh_shell = _make_libssh_shell(chunks)
+    else:
+        conn._ssh_shell = MagicMock()
+        conn._ssh_shell.recv.side_effect = [*chunks, socket.timeout]
+    conn._connected = True
+    result = {}
+
+    def worker():
+        try:
+            result["response"] = conn.receive(b"command")
+        except Exception as exc:
+            result["error"] = exc
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join(10)
+
+    assert "error" not in result
+    assert result["response"] == b"output"
+
+
+def test_network_cli_receive_invalid_buffer_size_raises(conn):
+    conn.set_options(direct={"ssh_type": "paramiko", "network_cli_recv_buffer_size": 0})
+    conn._terminal = _make_terminal_mock()
+    conn._ssh_shell = MagicMock()
+
+    with pytest.raises(AnsibleConnectionFailure) as excinfo:
+        conn.receive(b"command")
+
+    assert "network_cli_recv_buffer_size" in str(excinfo.value)
+
+
+def test_network_cli_find_prompt_combined_keeps_pattern_order(conn):
+    conn._terminal_stdout_re = [re.compile(rb"device\(config\)#"), re.compile(rb"\w+#")]
+    conn._log_messages = MagicMock()
+
+    assert conn._find_prompt(b"output\nrouter#\ndevice(config)#") is True
+    assert conn._matched_prompt == b"device(config)#"
+    assert conn._find_prompt(b"output\n") is False
+
+
+def test_network_cli_get_combined_re(conn):
+    regexes = [re.compile(rb"^ERROR", re.M), re.compile(rb"invalid input", re.I)]
+
+    combined = conn._get_combined_re(regexes)
+
+    assert combined.pattern == rb"(?m:^ERROR)|(?i:invalid input)"
+    assert combined.search(b"ok\nERROR: foo")
+    assert combined.search(b"% Invalid Input detected")
+    assert not combined.search(b"ok ERROR")
+    assert conn._get_combined_re(list(regexes)) is combined
+
+
+@pytest.mark.parametrize(
+    "regexes",
+    [
+        [re.compile(rb"device#")],
+        [re.compile(rb"(a)\1"), re.compile(rb"device#")],
+        [re.compile(rb"device#"), re.compile("device#")],
+        [re.compile(rb"(?i)device#"), re.compile(rb"router#")],
+    ],
+)
+def test_network_cli_get_combined_re_not_combinable(conn, regexes):
+    assert conn._get_combined_re(regexes) is None
+
+
+def test_network_cli_get_terminal_std_re_cached(conn):
+    conn.set_options(direct={"terminal_stdout_re": [{"pattern": "device#", "flags": "re.I"}]})
+
+    first = conn._get_terminal_std_re("terminal_stdout_re")
+    assert conn._get_terminal_std_re("terminal_stdout_re") is first
+
+    conn.set_options(direct={"terminal_stdout_re": [{"pattern": "router#"}]})
+    assert conn._get_terminal_std_re("terminal_stdout_re")[0].pattern == b"router#"
+
+
 # ---- _validate_timeout_value ----
 def test_network_cli_validate_timeout_value_negative_raises(conn):
     with pytest.raises(AnsibleConnectionFailure) as excinfo:
@@ -452,6 +847,37 @@ def test_network_cli_handle_prompt_single_match(conn):
     conn._ssh_shell.sendall.assert_called_once()
 
 
+def test_network_cli_handle_prompt_compiles_once(conn):
+    conn._ssh_shell = MagicMock()
+    conn._log_messages = MagicMock()
+
+    with patch.object(network_cli.re, "compile", wraps=re.compile) as mock_compile:
+        for data in (b"output", b"Destination filename [test]?"):
+            conn._handle_prompt(
+                data,
+                prompts=[b"Destination filename", b"confirm"],
+                answer=[b"", b"y"],
+                newline=True,
+            )
+
+    assert mock_compile.call_count == 2
+    conn._ssh_shell.sendall.assert_called_once_with(b"\r")
+
+
+def test_network_cli_regex_cache_bounded(conn):
+    conn._ssh_shell = MagicMock()
+    conn._log_messages = MagicMock()
+
+    for idx in range(network_cli.REGEX_CACHE_MAXSIZE + 10):
+        conn._handle_prompt(b"output", prompts=[b"prompt %d" % idx], answer=[b"y"], newline=True)
+        # the first prompt stays cached as it is used again
+        conn._handle_prompt(b"output", prompts=[b"prompt 0"], answer=[b"y"], newline=True)
+
+    assert len(conn._regex_cache) == network_cli.REGEX_CACHE_MAXSIZE
+    assert ("prompts", (b"prompt 0",), re.I) in conn._regex_cache
+    assert ("prompts", (b"prompt 1",), re.I) not in conn._regex_cache
+
+
 def test_network_cli_handle_prompt_regex_compile_error(conn):
     with pytest.raises(ConnectionError) as excinfo:
         conn._handle_prompt(
@@ -471,9 +897,26 @@ def test_network_cli_get_cache(conn):
         cache = conn.get_cache()
         assert cache is mock_get.return_value
         mock_get.assert_called_once_with("ansible.netcommon.memory")
+        cache.set_options.assert_called_once_with(direct={"prefix": conn._play_context.remote_addr})
     assert conn._cache is cache
 
 
+def test_network_cli_get_cache_configured_plugin(conn):
+    conn._cache = None
+    conn.set_options(direct={"single_user_mode_cache": "ansible.netcommon.jsonfile"})
+    with patch.object(cache_loader, "get", return_value=MagicMock()) as mock_get:
+        conn.get_cache()
+    mock_get.assert_called_once_with("ansible.netcommon.jsonfile")
+
+
+def test_network_cli_get_cache_invalid_plugin_raises(conn):
+    conn._cache = None
+    with patch.object(cache_loader, "get", return_value=None):
+        with pytest.raises(AnsibleConnectionFailure) as excinfo:
+            conn.get_cache()
+    assert "ansible.netcommon.memory" in str(excinfo.value)
+
+
 def test_network_cli_get_cache_reuses_existing(conn):
     existing = MagicMock()
     conn._cache = existing
@@ -507,6 +950,171 @@ def test_network_cli_is_in_config_mode_no_config_prompt_attr(conn):
     assert conn._is_in_config_mode() is False
 
 
+def test_network_cli_is_in_config_mode_checked_once_per_prompt(conn):
+    conn._terminal = MagicMock()
+    conn._terminal.terminal_config_prompt.match.return_value = True
+
+    conn._matched_prompt = b"R1(config)#"
+    assert conn._is_in_config_mode() is True
+    assert conn._is_in_config_mode() is True
+    assert conn._terminal.terminal_config_prompt.match.call_count == 1
+
+    conn._matched_prompt = b"R1(config-if)#"
+    conn._is_in_config_mode()
+    assert conn._terminal.terminal_config_prompt.match.call_count == 2
+
+
+# ---- _needs_cache_invalidation ----
+def test_network_cli_needs_cache_invalidation_config_commands(conn):
+    conn._matched_prompt = b"R1#"
+    conn._terminal = MagicMock(spec=[])
+    conn.cliconf = MagicMock()
+    conn.cliconf.get_option.return_value = ["write memory", "copy run start"]
+
+    assert conn._needs_cache_invalidation(b"write memory") is True
+    assert conn._needs_cache_invalidation(b"show version") is False
+    assert conn._get_config_commands() == frozenset(["write memory", "copy run start"])
+    conn.cliconf.get_option.assert_called_once_with("config_commands")
+
+
+def test_network_cli_needs_cache_invalidation_in_config_mode(conn):
+    conn._matched_prompt = b"R1(config)#"
+    conn._terminal = MagicMock()
+    conn._terminal.terminal_config_prompt = re.compile(r"\S+\(config\)#")
+    conn.cliconf = MagicMock()
+    conn.cliconf.get_option.return_value = []
+
+    assert conn._needs_cache_invalidation(b"hostname R2") is True
+
+
+def test_network_cli_needs_cache_invalidation_option_not_defined(conn):
+    conn._matched_prompt = b"R1#"
+    conn._terminal = MagicMock(spec=[])
+    conn.cliconf = MagicMock()
+    conn.cliconf.get_option.side_effect = KeyError("config_commands")
+
+    assert conn._needs_cache_invalidation(b"write memory") is False
+
+
+def test_network_cli_set_options_resets_config_commands(conn):
+    conn._config_commands = frozenset(["write memory"])
+    conn.set_options(direct={"single_user_mode": True})
+    assert conn._config_commands is None
+
+
+# ---- selective cache invalidation ----
+def _make_invalidation_cache(conn, invalidation_map):
+    conn._cache = cache_loader.get("ansible.netcommon.memory")
+    for command in (b"show version", b"show interfaces", b"show running-config"):
+        conn._cache.populate(command, "output")
+    conn.cliconf = MagicMock()
+    conn.cliconf.get_cache_invalidation_map.return_value = invalidation_map
+    return conn._cache
+
+
+def test_network_cli_invalidate_cache_unmapped_command_flushes(conn):
+    cache = _make_invalidation_cache(conn, {r"interface\s": [r"show interfaces"]})
+    conn._matched_prompt = b"R1(config)#"
+
+    conn._invalidate_cache(b"hostname R2", b"R1(config)#")
+
+    assert list(cache.keys()) == []
+
+
+def test_network_cli_invalidate_cache_mapped_command(conn):
+    cache = _make_invalidation_cache(
+        conn, {r"interface\s": [r"show interfaces", r"show run"], r"configure": []}
+    )
+    conn._matched_prompt = b"R1(config)#"
+    conn._invalidate_cache(b"configure terminal", b"R1#")
+    assert len(cache.keys()) == 3
+
+    conn._matched_prompt = b"R1(config-if)#"
+    conn._invalidate_cache(b"interface Ethernet1", b"R1(config)#")
+
+    assert list(cache.keys()) == [b"show version"]
+
+
+def test_network_cli_invalidate_cache_section_lines_share_scope(conn):
+    cache = _make_invalidation_cache(conn, {r"interface\s": [r"show interfaces"]})
+    conn._matched_prompt = b"R1(config-if)#"
+    conn._invalidate_cache(b"interface Ethernet1", b"R1(config)#")
+    cache.populate(b"show interfaces", "output")
+
+    # sent at the prompt the interface command switched to
+    conn._invalidate_cache(b"description uplink", b"R1(config-if)#")
+    assert sorted(cache.keys()) == [b"show running-config", b"show version"]
+
+    # back at the top level config prompt, the scope no longer applies
+    conn._matched_prompt = b"R1(config)#"
+    conn._invalidate_cache(b"ntp server 192.0.2.1", b"R1(config)#")
+    assert list(cache.keys()) == []
+    assert conn._cache_invalidation_scope is None
+
+
+def test_network_cli_invalidate_cache_unmapped_section_ends_scope(conn):
+    cache = _make_invalidation_cache(conn, {r"router ospf": [r"show ip ospf"]})
+    conn._matched_prompt = b"R1(config-router)#"
+    conn._invalidate_cache(b"router ospf 1", b"R1(config)#")
+    cache.populate(b"show ip bgp summary", "output")
+
+    # router bgp opens a new section at the same prompt
+    conn._invalidate_cache(b"router bgp 65000", b"R1(config-router)#")
+    assert list(cache.keys()) == []
+    assert conn._cache_invalidation_scope is None
+
+    cache.populate(b"show ip bgp summary", "output")
+    conn._invalidate_cache(b"neighbor 192.0.2.1 remote-as 65001", b"R1(config-router)#")
+    assert list(cache.keys()) == []
+
+
+def test_network_cli_invalidate_cache_prompt_change_ends_scope(conn):
+    cache = _make_invalidation_cache(conn, {r"interface\s": [r"show interfaces"]})
+    conn._matched_prompt = b"R1(config-if)#"
+    conn._invalidate_cache(b"interface Ethernet1", b"R1(config)#")
+
+    conn._matched_prompt = b"R1(config-router)#"
+    conn._invalidate_cache(b"router bgp 65000", b"R1(config-if)#")
+
+    assert list(cache.keys()) == []
+    assert conn._cache_invalidation_scope is None
+
+
+def test_network_cli_invalidate_cache_policy_compiled_once(conn):
+    _make_invalidation_cache(conn, {r"interface\s": r"show interfaces"})
+    policy = conn._get_cache_invalidation_policy()
+    assert conn._get_cache_invalidation_policy() is policy
+    assert policy[0][1][0].pattern == "show interfaces"
+    conn.cliconf.get_cache_invalidation_map.assert_called_once_with()
+
+
+def test_network_cli_invalidate_cache_cliconf_without_map(conn):
+    cache = _make_invalidation_cache(conn, {})
+    conn.cliconf = MagicMock(spec=[])
+    conn._matched_prompt = b"R1(config-if)#"
+
+    conn._invalidate_cache(b"interface Ethernet1", b"R1(config)#")
+
+    assert list(cache.keys()) == []
+
+
+def test_network_cli_send_invalidates_cache_with_previous_prompt(conn):
+    conn._connected = True
+    conn._ssh_shell = MagicMock()
+    conn._single_user_mode = True
+    conn._cache = MagicMock()
+    conn._cache.lookup.return_value = None
+    conn._matched_prompt = b"R1(config)#"
+    conn.receive = MagicMock(return_value=b"")
+    conn._needs_cache_invalidation = MagicMock(return_value=True)
+    conn._invalidate_cache = MagicMock()
+
+    conn.send(b"interface Ethernet1")
+
+    conn._invalidate_cache.assert_called_once_with(b"interface Ethernet1", b"R1(config)#")
+    conn._cache.populate.assert_not_called()
+
+
 # ---- send check_all validation ----
 def test_network_cli_send_check_all_prompt_answer_length_mismatch(conn):
     conn._connected = True